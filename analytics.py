@@ -0,0 +1,312 @@
+import os
+import re
+import json
+import math
+import sqlite3
+import logging
+import argparse
+from collections import defaultdict
+
+import pandas as pd
+
+from store import iter_listings
+
+ANALYTICS_DB_FILE = os.path.join("cache", "analytics.db")
+
+# Groupings kept up to date; 'all' has the single key 'All'
+DIMENSIONS = {
+    'all': None,
+    'city': 'city',
+    'neighborhood': 'neighborhoods',
+    'type': 'typeName',
+}
+
+METRICS = ['price', 'price_drop', 'price_drop_pct', 'ppsf']
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+# Relative error of sketch percentiles
+SKETCH_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """
+    Mergeable percentile sketch with bounded relative error (log-spaced buckets, as in DDSketch).
+
+    Values can be removed as well as added, which lets a listing's old price
+    be swapped for its new one without rebuilding. Only positive values are
+    bucketed; zeros are counted separately.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY, buckets=None, zeros=0):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = defaultdict(int, buckets or {})
+        self.zeros = zeros
+
+    def _bucket(self, value):
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def add(self, value, weight=1):
+        if value <= 0:
+            self.zeros += weight
+            return
+        bucket = self._bucket(value)
+        self.buckets[bucket] += weight
+        if self.buckets[bucket] <= 0:
+            del self.buckets[bucket]
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def quantile(self, q):
+        """Approximate q-quantile, or None if the sketch is empty."""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                # Midpoint of the bucket's range, within the relative error of any value in it
+                return 2 * self.gamma ** bucket / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_json(self):
+        return json.dumps({'a': self.accuracy, 'z': self.zeros, 'b': self.buckets})
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls(data['a'], {int(k): v for k, v in data['b'].items()}, data['z'])
+
+
+def connect(db_path=ANALYTICS_DB_FILE):
+    """Open the analytics database, creating its tables if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # What each listing currently contributes, so an update can take it back out
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS contributions ("
+        "listingID TEXT PRIMARY KEY, contribution TEXT NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS aggregates ("
+        "dimension TEXT NOT NULL, key TEXT NOT NULL, metric TEXT NOT NULL, "
+        "count INTEGER NOT NULL, sum REAL NOT NULL, sketch TEXT NOT NULL, "
+        "PRIMARY KEY (dimension, key, metric))"
+    )
+    return conn
+
+
+def _to_number(value):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(str(value).replace(',', '').replace('$', ''))
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _square_feet(listing):
+    """Square footage, from squareFeet or the midpoint of a range such as '2500-3000'."""
+    square_feet = _to_number(listing.get('squareFeet'))
+    if square_feet:
+        return square_feet
+    bounds = [float(n) for n in re.findall(r'\d+', str(listing.get('squareFeetText') or ''))]
+    return sum(bounds) / len(bounds) if bounds else None
+
+
+def listing_metrics(listing):
+    """
+    The metric values one listing contributes.
+
+    :return: Dictionary of metric -> value for the metrics that apply to it.
+    """
+    metrics = {}
+    price = _to_number(listing.get('price'))
+    if not price or price <= 0:
+        return metrics
+    metrics['price'] = price
+
+    original = _to_number(listing.get('originalListPrice'))
+    if original and original > price:
+        metrics['price_drop'] = original - price
+        metrics['price_drop_pct'] = round(100 * (original - price) / original, 4)
+
+    ppsf = _to_number(listing.get('pricePerSquareFoot'))
+    if not ppsf:
+        square_feet = _square_feet(listing)
+        ppsf = price / square_feet if square_feet else None
+    if ppsf:
+        metrics['ppsf'] = round(ppsf, 2)
+    return metrics
+
+
+def _contribution(listing):
+    keys = {}
+    for dimension, field in DIMENSIONS.items():
+        value = 'All' if field is None else listing.get(field)
+        if value not in (None, ""):
+            keys[dimension] = str(value)
+    return {'keys': keys, 'metrics': listing_metrics(listing)}
+
+
+def update_listings(listings, db_path=ANALYTICS_DB_FILE):
+    """
+    Fold upserted listings into the running aggregates.
+
+    A listing seen before has its previous contribution removed first, so
+    re-scraping the same listings doesn't double count and price changes
+    move it between percentiles. Cost is proportional to the batch, not to
+    the history.
+
+    :param listings: Listing dictionaries from the API.
+    :param db_path: Path to the analytics database.
+    :return: Number of listings whose contribution changed.
+    """
+    latest = {
+        str(listing['listingID']): _contribution(listing)
+        for listing in listings if listing.get('listingID') is not None
+    }
+    if not latest:
+        return 0
+
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        previous = {}
+        ids = list(latest)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for listing_id, contribution in conn.execute(
+                f"SELECT listingID, contribution FROM contributions WHERE listingID IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            ):
+                previous[listing_id] = json.loads(contribution)
+
+        # (dimension, key, metric) -> list of (value, +1/-1)
+        deltas = defaultdict(list)
+        changed = []
+        for listing_id, contribution in latest.items():
+            old = previous.get(listing_id)
+            if old == contribution:
+                continue
+            for sign, entry in ((-1, old), (1, contribution)):
+                if entry is None:
+                    continue
+                for dimension, key in entry['keys'].items():
+                    for metric, value in entry['metrics'].items():
+                        deltas[(dimension, key, metric)].append((value, sign))
+            changed.append((listing_id, json.dumps(contribution)))
+
+        for (dimension, key, metric), values in deltas.items():
+            row = conn.execute(
+                "SELECT count, sum, sketch FROM aggregates WHERE dimension = ? AND key = ? AND metric = ?",
+                (dimension, key, metric)
+            ).fetchone()
+            count, total, sketch = (row[0], row[1], QuantileSketch.from_json(row[2])) if row else (0, 0.0, QuantileSketch())
+            for value, sign in values:
+                count += sign
+                total += sign * value
+                sketch.add(value, sign)
+            if count > 0:
+                conn.execute(
+                    "INSERT OR REPLACE INTO aggregates (dimension, key, metric, count, sum, sketch) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (dimension, key, metric, count, total, sketch.to_json())
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM aggregates WHERE dimension = ? AND key = ? AND metric = ?", (dimension, key, metric)
+                )
+        conn.executemany("INSERT OR REPLACE INTO contributions (listingID, contribution) VALUES (?, ?)", changed)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    logging.info(f"Analytics: updated {len(changed)} of {len(latest)} listings across {len(deltas)} aggregates")
+    return len(changed)
+
+
+def summary(dimension='city', metric='price', quantiles=DEFAULT_QUANTILES, min_count=1, db_path=ANALYTICS_DB_FILE):
+    """
+    Running aggregates of one metric per group, read without touching the listings.
+
+    :param dimension: One of DIMENSIONS.
+    :param metric: One of METRICS.
+    :param quantiles: Percentiles to estimate from each group's sketch.
+    :param min_count: Drop groups with fewer values.
+    :param db_path: Path to the analytics database.
+    :return: DataFrame with key, count, sum, mean and one p<NN> column per quantile, largest groups first.
+    """
+    if dimension not in DIMENSIONS or metric not in METRICS:
+        raise ValueError(f"Unknown dimension or metric: {dimension}, {metric}")
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT key, count, sum, sketch FROM aggregates WHERE dimension = ? AND metric = ? AND count >= ? "
+            "ORDER BY count DESC",
+            (dimension, metric, min_count)
+        ).fetchall()
+    finally:
+        conn.close()
+    records = []
+    for key, count, total, sketch_json in rows:
+        sketch = QuantileSketch.from_json(sketch_json)
+        record = {'key': key, 'count': count, 'sum': total, 'mean': total / count}
+        for q in quantiles:
+            record[f"p{int(round(q * 100))}"] = sketch.quantile(q)
+        records.append(record)
+    columns = ['key', 'count', 'sum', 'mean', *(f"p{int(round(q * 100))}" for q in quantiles)]
+    return pd.DataFrame(records, columns=columns)
+
+
+def price_drop_summary(dimension='city', min_count=1, db_path=ANALYTICS_DB_FILE):
+    """
+    Share of listings with a price cut and the typical cut, per group.
+
+    :return: DataFrame with key, listings, reduced, share_reduced and median drop amount and percent.
+    """
+    prices = summary(dimension, 'price', quantiles=(), min_count=min_count, db_path=db_path)
+    drops = summary(dimension, 'price_drop', quantiles=(0.5,), db_path=db_path)
+    drop_pcts = summary(dimension, 'price_drop_pct', quantiles=(0.5,), db_path=db_path)
+    merged = prices[['key', 'count']].rename(columns={'count': 'listings'})
+    merged = merged.merge(
+        drops[['key', 'count', 'p50']].rename(columns={'count': 'reduced', 'p50': 'median_drop'}), on='key', how='left'
+    ).merge(drop_pcts[['key', 'p50']].rename(columns={'p50': 'median_drop_pct'}), on='key', how='left')
+    merged['reduced'] = merged['reduced'].fillna(0).astype(int)
+    merged['share_reduced'] = (merged['reduced'] / merged['listings']).round(4)
+    return merged
+
+
+def rebuild(listings, db_path=ANALYTICS_DB_FILE):
+    """Drop all aggregates and rebuild them from a full set of listings."""
+    conn = connect(db_path)
+    try:
+        conn.execute("DELETE FROM aggregates")
+        conn.execute("DELETE FROM contributions")
+    finally:
+        conn.close()
+    return update_listings(listings, db_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or rebuild the running price analytics.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild from every listing in the listing store")
+    parser.add_argument("--dimension", default="city", choices=list(DIMENSIONS))
+    parser.add_argument("--metric", default="price", choices=METRICS)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild(iter_listings())
+    print(summary(args.dimension, args.metric).to_string(index=False))
@@ -1,11 +1,41 @@
 import pandas as pd
 import streamlit as st
 from datetime import datetime, timedelta
-import json
-from scraper import paginate_results
+from scraper import (
+    DEFAULT_VERIFICATION_TTL,
+    get_cache_key,
+    get_cache_timestamp,
+    get_projection_stats,
+    get_scrape_progress,
+    paginate_results,
+    sync_listings
+)
+from matching import DEFAULT_MATCH_THRESHOLD, find_fuzzy_matching_listings, postal_fsa
+from clients import load_client_book, read_client_columns
+from verification import (
+    join_verification_results,
+    prioritize_listing_ids,
+    status_change_labels,
+    verification_results_to_frame
+)
+from prewarm import DEFAULT_RANGE_DAYS, get_last_refreshed, record_range_request
+from profiling import finish_run, span, start_run
+from exports import available_formats, export_frame, save_snapshot_async
+import analytics
+import datasets
+import geo
+import history
+import memory
+import store
+import transport
 import utils
+import watchlist
 import plotly.express as px
 
+# Live view while a scrape runs: newest rows only, since the full table renders at the end
+LIVE_TABLE_ROWS = 200
+LIVE_TABLE_COLUMNS = ['streetAddress', 'city', 'price', 'status', 'typeName', 'modified']
+
 # Page config
 st.set_page_config(
     page_title="Team Arora - Real Estate Data Scraper",
@@ -24,50 +54,38 @@ if 'use_cache' not in st.session_state:
     st.session_state.use_cache = True
 if 'client_data' not in st.session_state:
     st.session_state.client_data = None
+if 'client_book' not in st.session_state:
+    st.session_state.client_book = None
 if 'address_column' not in st.session_state:
     st.session_state.address_column = None
 if 'verification_complete' not in st.session_state:
     st.session_state.verification_complete = False
 if 'verified_data' not in st.session_state:
     st.session_state.verified_data = None
+if 'spilled' not in st.session_state:
+    # Cache key of a scrape too big to hold in memory, browsed from the listing store
+    st.session_state.spilled = None
+if 'scraped_at' not in st.session_state:
+    st.session_state.scraped_at = None
+if 'match_threshold' not in st.session_state:
+    st.session_state.match_threshold = DEFAULT_MATCH_THRESHOLD
 
-def normalize_address(address):
-    """Normalize address for comparison by removing common variations."""
-    if pd.isna(address):
-        return ""
-    address = str(address).lower()
-    # Remove common terms and extra spaces
-    replacements = [
-        ('avenue', 'ave'),
-        ('street', 'st'),
-        ('road', 'rd'),
-        ('drive', 'dr'),
-        ('boulevard', 'blvd'),
-        ('court', 'ct'),
-        (',', ''),
-        ('.', ''),
-        ('  ', ' ')
-    ]
-    for old, new in replacements:
-        address = address.replace(old, new)
-    return address.strip()
-
-def find_matching_terminated_listings(terminated_df, client_df, address_column):
-    """Find terminated listings that match client addresses."""
-    # Normalize addresses in both dataframes
-    terminated_df['normalized_address'] = terminated_df['streetAddress'].apply(normalize_address)
-    client_df['normalized_address'] = client_df[address_column].apply(normalize_address)
-
-    # Find matches
-    matches = pd.merge(
-        terminated_df,
-        client_df,
-        on='normalized_address',
-        how='inner',
-        suffixes=('_terminated', '_client')
-    )
+def release_dataset():
+    """Drop this session's reference to its shared dataset so it can be evicted."""
+    handle = st.session_state.get('dataset')
+    if handle is not None:
+        handle.release()
+    st.session_state.dataset = None
+    st.session_state.data = None
 
-    return matches
+def build_verified_frame(verification_results):
+    """Join verification results onto the scraped listings and label each status change."""
+    verified_df = join_verification_results(
+        st.session_state.data,
+        verification_results_to_frame(verification_results)
+    )
+    verified_df['Status Change'] = status_change_labels(verified_df)
+    return verified_df
 
 def verify_listings():
     """Verify the current status of previously scraped listings."""
@@ -82,32 +100,56 @@ def verify_listings():
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Get listing IDs from the scraped data
-        listing_ids = st.session_state.data['listingID'].tolist()
+        partial_view = st.empty()
         
-        # Import the verification function
-        from scraper import verify_listing_status
-        
-        # Verify the current status of listings
-        verification_results = verify_listing_status(
-            listing_ids=listing_ids,
-            progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text)
-        )
+        # Verify client-matched and recently active listings first
+        matched_ids = []
+        if st.session_state.client_book is not None:
+            client_book = st.session_state.client_book
+            matches = find_fuzzy_matching_listings(
+                st.session_state.data,
+                client_book.frame,
+                client_book.address_columns,
+                threshold=st.session_state.match_threshold,
+                client_index=client_book.address_index
+            )
+            matched_ids = matches['listingID'].tolist()
+        listing_ids = prioritize_listing_ids(st.session_state.data, matched_ids)
         
-        # Create a DataFrame with verification results
-        import pandas as pd
-        verified_data = []
+        # Import the verification functions
+        from scraper import verify_listing_status, verify_listing_status_since
+
+        def show_partial_results(partial_results):
+            partial_df = build_verified_frame(partial_results)
+            changed = partial_df[partial_df['Status Change'] != "✅ Still Terminated"]
+            with partial_view.container():
+                st.caption(f"{len(partial_df)} listings verified so far, {len(changed)} changed")
+                st.dataframe(
+                    changed[['streetAddress', 'city', 'Status Change', 'status', 'modified']],
+                    hide_index=True,
+                    use_container_width=True
+                )
         
-        for listing_id, status_info in verification_results.items():
-            # Find the original listing in the scraped data
-            original_listing = st.session_state.data[st.session_state.data['listingID'] == listing_id].iloc[0].to_dict()
-            
-            # Add verification information
-            original_listing.update(status_info)
-            verified_data.append(original_listing)
+        # Verify the current status of listings
+        if st.session_state.verification_mode == "Changed-since scan" and st.session_state.scraped_at is not None:
+            verification_results = verify_listing_status_since(
+                listing_ids=listing_ids,
+                since=st.session_state.scraped_at,
+                progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text)
+            )
+        else:
+            verification_results = verify_listing_status(
+                listing_ids=listing_ids,
+                progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text),
+                use_cache=st.session_state.use_cache,
+                cache_ttl=timedelta(hours=st.session_state.verification_ttl_hours),
+                max_seconds=st.session_state.verification_max_seconds or None,
+                max_requests=st.session_state.verification_max_requests or None,
+                partial_results_callback=show_partial_results
+            )
+        partial_view.empty()
         
-        # Convert to DataFrame
-        verified_df = pd.DataFrame(verified_data)
+        verified_df = build_verified_frame(verification_results)
         
         # Store in session state
         st.session_state.verified_data = verified_df
@@ -116,17 +158,55 @@ def verify_listings():
         # Complete progress
         progress_bar.progress(100)
         status_text.text("Verification completed!")
+        unverified = sum(1 for result in verification_results.values() if not result.get('verified'))
+        if unverified:
+            st.warning(f"{unverified} listings could not be verified because the API requests failed; try again later.")
         
     except Exception as e:
         st.error(f"An error occurred during verification: {str(e)}")
 
+def run_incremental_sync():
+    """Fetch only listings updated since the last sync and show the selected range from the store."""
+    try:
+        st.session_state.verification_complete = False
+        st.session_state.verified_data = None
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        start_date = datetime.combine(st.session_state.start_date, datetime.min.time())
+        end_date = datetime.combine(st.session_state.end_date, datetime.min.time())
+
+        new_listings = sync_listings(
+            initial_start=start_date,
+            progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text)
+        )
+
+        df = store.query_listings(
+            limit=None,
+            modified_range=(start_date.date().isoformat(), (end_date + timedelta(days=1)).date().isoformat()),
+            statuses=['TER']
+        )
+        if len(df) > 0:
+            release_dataset()
+            st.session_state.data = df
+            st.session_state.scraping_complete = True
+            st.session_state.scraped_at = datetime.now()
+
+        progress_bar.progress(100)
+        status_text.text(f"Refresh completed: {len(new_listings)} listings updated since the last sync")
+
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+
 def run_scraper():
     """Execute the scraping process with the selected date range."""
     try:
-        st.session_state.data = None
+        release_dataset()
         st.session_state.scraping_complete = False
         st.session_state.verification_complete = False
         st.session_state.verified_data = None
+        st.session_state.spilled = None
 
         progress_bar = st.progress(0)
         status_text = st.empty()
@@ -134,31 +214,122 @@ def run_scraper():
         # Convert dates to datetime objects
         start_date = datetime.combine(st.session_state.start_date, datetime.min.time())
         end_date = datetime.combine(st.session_state.end_date, datetime.min.time())
+        cache_key = get_cache_key(end_date.strftime('%Y%m%d'), start_date.strftime('%Y%m%d'))
 
-        # Execute scraping with cache control
-        all_data = paginate_results(
-            start_date=end_date,  # Reversed because we want newer data first
-            end_date=start_date,
-            progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text),
-            use_cache=st.session_state.use_cache
-        )
+        record_range_request(start_date, end_date)
+
+        if st.session_state.get('profile_next_run'):
+            start_run("scrape", use_cprofile=st.session_state.get('profile_cprofile', False), sample_interval=0.01)
+
+        fetched = {}
+        partial_view = st.empty()
+        live = {'matched_upto': 0, 'matches': []}
+        client_book = st.session_state.client_book
+
+        def show_partial_results(listings, progress):
+            # Only the listings that arrived since the last event are matched against the clients
+            new_listings = listings[live['matched_upto']:len(listings)]
+            live['matched_upto'] += len(new_listings)
+            if client_book is not None and new_listings:
+                new_frame = pd.DataFrame(new_listings)
+                if 'streetAddress' in new_frame.columns:
+                    matches = find_fuzzy_matching_listings(
+                        new_frame,
+                        client_book.frame,
+                        client_book.address_columns,
+                        threshold=st.session_state.match_threshold,
+                        client_index=client_book.address_index
+                    )
+                    if len(matches) > 0:
+                        live['matches'].append(matches)
+            eta = progress['eta_seconds']
+            with partial_view.container():
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Listings so far", progress['listings'])
+                col2.metric("Windows", f"{progress['windows_done']}/{progress['windows_total']}")
+                col3.metric("Requests/sec", f"{progress['requests_per_second']:.1f}")
+                col4.metric("ETA", "—" if eta is None else f"{eta:.0f}s")
+                if live['matches']:
+                    st.subheader("Client Matches So Far")
+                    st.dataframe(
+                        pd.concat(live['matches'], ignore_index=True),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+                recent = pd.DataFrame(listings[-LIVE_TABLE_ROWS:])
+                st.dataframe(
+                    recent[[col for col in LIVE_TABLE_COLUMNS if col in recent.columns]],
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+        ceiling_mb = st.session_state.get('memory_ceiling_mb')
+        spill = {'hit': False}
+
+        def spill_check():
+            # Polled while windows are collected, so a scrape too big to hold goes to the store early
+            spill['hit'] = spill['hit'] or memory.over_ceiling(ceiling_mb)
+            return spill['hit']
+
+        def build_frame():
+            # Only runs when no other session is already sharing this range
+            with span("scrape"):
+                all_data = paginate_results(
+                    start_date=end_date,  # Reversed because we want newer data first
+                    end_date=start_date,
+                    progress_callback=lambda p, msg: utils.update_progress(p, msg, progress_bar, status_text),
+                    use_cache=st.session_state.use_cache,
+                    partial_results_callback=show_partial_results,
+                    spill_check=spill_check
+                )
+
+            memory.checkpoint("scrape")
+            if spill['hit']:
+                # Too big to hold in memory: browse it from the listing store instead
+                st.session_state.spilled = cache_key
+                st.warning(
+                    f"Memory is above the {ceiling_mb:.0f} MB ceiling, "
+                    "so this scrape is shown from the listing store page by page."
+                )
+                return None
+            if not all_data:
+                return None
+            fetched['data'] = all_data
 
-        if all_data:
             # Convert to DataFrame for display
-            df = pd.DataFrame(all_data)
+            with span("dataframe"):
+                df = pd.DataFrame(all_data)
 
-            # Clean up numerical columns
-            numeric_columns = ['price', 'originalListPrice', 'priceLow', 'squareFeet']
-            for col in numeric_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+                # Clean up numerical columns
+                numeric_columns = ['price', 'originalListPrice', 'priceLow', 'squareFeet']
+                for col in numeric_columns:
+                    if col in df.columns:
+                        df[col] = pd.to_numeric(df[col], errors='coerce')
+            return df
 
-            st.session_state.data = df
+        def show_waiting():
+            # Another session is scraping this range; follow its progress until its frame is shared
+            fraction, message = get_scrape_progress(cache_key) or (0.0, "starting")
+            utils.update_progress(fraction, f"Waiting for another session's scrape of this range: {message}",
+                                  progress_bar, status_text)
+
+        # Sessions looking at the same range share one read-only frame
+        handle = datasets.acquire(cache_key, build_frame, refresh=not st.session_state.use_cache,
+                                  on_wait=show_waiting)
+        partial_view.empty()
+
+        if handle is not None:
+            st.session_state.dataset = handle
+            st.session_state.data = handle.frame
             st.session_state.scraping_complete = True
+            memory.checkpoint("dataframe")
 
-            # Save to JSON
-            with open('latest_scrape.json', 'w') as f:
-                json.dump(all_data, f, indent=4)
+            # Cached data is as old as its cache file; fresh data is as of now
+            st.session_state.scraped_at = get_cache_timestamp(cache_key) or datetime.now()
+
+            # Save to JSON in the background so the UI doesn't wait on serialization
+            if 'data' in fetched:
+                save_snapshot_async(fetched['data'])
 
         progress_bar.progress(100)
         status_text.text("Scraping completed!")
@@ -166,6 +337,215 @@ def run_scraper():
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
 
+def render_downloads(df, file_stem, key):
+    """Download button whose export is only built, chunk by chunk, when clicked."""
+    formats = available_formats()
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        fmt = st.selectbox("Export format", options=list(formats), key=f"{key}_export_format")
+    extension, mime = formats[fmt]
+    with col2:
+        st.download_button(
+            label=f"Download {fmt}",
+            data=lambda: export_frame(df, fmt),
+            file_name=f"{file_stem}.{extension}",
+            mime=mime,
+            key=f"{key}_download"
+        )
+
+def render_listing_store(run_id=None):
+    """
+    Browse the listing store, pushing filters down so only the visible page is loaded.
+
+    :param run_id: Only browse the listings of this scrape, e.g. one spilled to the store.
+    """
+    st.header("Listing Store" if run_id is None else f"Scrape {run_id} (from the listing store)")
+    low, high = store.price_bounds()
+    if high == 0:
+        st.info("The listing store is empty. Run a scrape to populate it.")
+        return
+
+    with st.expander("Filters", expanded=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            price_range = None
+            if high > low:
+                price_range = st.slider("Price Range ($)", low, high, (low, high), key="store_price_range")
+        with col2:
+            cities = st.multiselect("Cities", options=store.distinct_values('city'), key="store_cities")
+        with col3:
+            property_types = st.multiselect("Property Types", options=store.distinct_values('typeName'), key="store_types")
+        with col4:
+            statuses = st.multiselect("Statuses", options=store.distinct_values('status'), key="store_statuses")
+
+    filters = dict(cities=cities, property_types=property_types, statuses=statuses, price_range=price_range,
+                   run_id=run_id)
+    total = store.count_listings(**filters)
+    page_size = 100
+    pages = max(1, -(-total // page_size))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="store_page")
+    st.write(f"Matching listings: {total}")
+
+    st.dataframe(
+        store.query_listings(limit=page_size, offset=(page - 1) * page_size, **filters),
+        hide_index=True,
+        use_container_width=True
+    )
+
+    render_listing_history()
+
+def render_listing_history():
+    """Look up one listing's recorded changes, or every listing's state as of a past date."""
+    with st.expander("Listing History"):
+        col1, col2 = st.columns(2)
+        with col1:
+            listing_id = st.text_input("Listing ID", key="history_listing_id")
+        with col2:
+            as_of = st.date_input("State as of", value=None, key="history_as_of")
+        if listing_id:
+            changes = history.transitions(listing_id.strip())
+            if len(changes) > 0:
+                st.dataframe(changes, hide_index=True, use_container_width=True)
+            else:
+                st.info(f"No recorded history for {listing_id}.")
+        if as_of is not None:
+            states = history.state_as_of(datetime.combine(as_of + timedelta(days=1), datetime.min.time()))
+            st.write(f"{len(states)} listings known by the end of {as_of:%Y-%m-%d}")
+            st.dataframe(states, hide_index=True, use_container_width=True)
+
+def render_map(df, filtered_df):
+    """Binned listing map, plus listings near a client's postal area via the spatial index."""
+    if 'latitude' not in df.columns or 'longitude' not in df.columns:
+        return
+    # Built once per loaded frame; reruns reuse it
+    if st.session_state.get('geo_index') is None or st.session_state.geo_index.df is not df:
+        with span("spatial_index"):
+            st.session_state.geo_index = geo.build_index(df)
+    geo_index = st.session_state.geo_index
+
+    with st.expander("Map", expanded=True):
+        bin_km = st.select_slider("Cell size (km)", options=[0.5, 1, 2, 5, 10], value=2, key="map_bin_km")
+        bins = geo.bin_listings(filtered_df, bin_degrees=bin_km / 111.0)
+        if len(bins) == 0:
+            st.info("No listings with coordinates to map.")
+        else:
+            fig_map = px.scatter_map(
+                bins,
+                lat='latitude',
+                lon='longitude',
+                size='listings',
+                color='median_price',
+                hover_data={'listings': True, 'median_price': ':$,.0f'},
+                zoom=9,
+                height=500
+            )
+            fig_map.update_layout(margin=dict(t=0, b=0, l=0, r=0))
+            st.plotly_chart(fig_map, use_container_width=True)
+            st.caption(f"{len(filtered_df)} listings in {len(bins)} cells")
+
+        centroids = geo.postal_centroids(df)
+        client_book = st.session_state.client_book
+        if client_book is None or len(centroids) == 0:
+            return
+        zip_columns = [col for col in client_book.frame.columns if str(col).endswith("- Zip")]
+        client_areas = sorted({
+            postal_fsa(code) for col in zip_columns for code in client_book.frame[col].dropna().tolist()
+        } & set(centroids.index))
+        if not client_areas:
+            return
+        st.subheader("Listings Near a Client's Postal Area")
+        col1, col2 = st.columns(2)
+        with col1:
+            area = st.selectbox("Client postal area (FSA)", options=client_areas, key="map_client_area")
+        with col2:
+            radius_km = st.slider("Radius (km)", 0.5, 10.0, 2.0, 0.5, key="map_radius_km")
+        centre = centroids.loc[area]
+        nearby = geo_index.radius(centre['latitude'], centre['longitude'], radius_km)
+        st.write(f"{len(nearby)} listings within {radius_km} km of {area}")
+        st.dataframe(
+            nearby[[col for col in ['distance_km', 'streetAddress', 'city', 'price', 'status', 'typeName']
+                    if col in nearby.columns]],
+            hide_index=True,
+            use_container_width=True
+        )
+
+def render_price_analytics():
+    """Running price-cut and price per square foot figures over every listing ever stored."""
+    with st.expander("Price Drops and Price per Sq Ft"):
+        st.caption("Kept up to date at every scrape; covers all stored listings, not just the current filters.")
+        dimension = st.selectbox(
+            "Group by", options=[d for d in analytics.DIMENSIONS if d != 'all'], key="analytics_dimension"
+        )
+        min_count = st.number_input("Minimum listings per group", min_value=1, value=5, key="analytics_min_count")
+        drops = analytics.price_drop_summary(dimension, min_count=min_count)
+        ppsf = analytics.summary(dimension, 'ppsf', min_count=min_count)
+        if len(drops) == 0 and len(ppsf) == 0:
+            st.info("No price analytics yet; run a scrape first.")
+            return
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Price Drops")
+            st.dataframe(
+                drops.rename(columns={'key': dimension}),
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    'share_reduced': st.column_config.NumberColumn("Share reduced", format="percent"),
+                    'median_drop': st.column_config.NumberColumn("Median drop", format="dollar"),
+                    'median_drop_pct': st.column_config.NumberColumn("Median drop %", format="%.1f%%"),
+                }
+            )
+        with col2:
+            st.subheader("Price per Sq Ft")
+            st.dataframe(
+                ppsf.drop(columns=['sum']).rename(columns={'key': dimension}),
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    col: st.column_config.NumberColumn(col, format="dollar")
+                    for col in ppsf.columns if col == 'mean' or col.startswith('p')
+                }
+            )
+
+def render_transfer_stats():
+    """Show bytes on the wire and parse time per projection profile, and streams per connection."""
+    stats = get_projection_stats()
+    if not stats:
+        return
+    with st.expander("Transfer Statistics"):
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Profile': profile,
+                    'Requests': s['requests'],
+                    'KiB on wire': round(s['bytes'] / 1024, 1),
+                    'Parse time (s)': round(s['parse_seconds'], 3),
+                    'Listings': s['listings'],
+                }
+                for profile, s in stats.items()
+            ]),
+            hide_index=True,
+            use_container_width=True
+        )
+        connections = transport.get_connection_stats()
+        if connections:
+            st.caption(f"Connections ({transport.DEFAULT_TRANSPORT} transport)")
+            st.dataframe(
+                pd.DataFrame([
+                    {
+                        'Connection': c['connection'],
+                        'Streams': c['streams'],
+                        'Peak concurrent': c['max_concurrent'],
+                        'KiB on wire': round(c['wire_bytes'] / 1024, 1),
+                        'Compression ratio': c['compression_ratio'],
+                        'Encodings': c['encodings'],
+                    }
+                    for c in connections
+                ]),
+                hide_index=True,
+                use_container_width=True
+            )
+
 # Main layout
 st.title("🏠 Real Estate Data Scraper")
 
@@ -182,7 +562,7 @@ with st.sidebar:
     with col1:
         start_date = st.date_input(
             "Start Date",
-            datetime.now() - timedelta(days=7),
+            datetime.now() - timedelta(days=DEFAULT_RANGE_DAYS),
             key="start_date"
         )
     with col2:
@@ -198,18 +578,31 @@ with st.sidebar:
         value=True,
         help="When enabled, previously scraped data will be reused for the same date range"
     )
+    last_refreshed = get_last_refreshed(
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date, datetime.min.time())
+    )
+    if last_refreshed is not None:
+        st.caption(f"Cache for this range last refreshed {last_refreshed:%Y-%m-%d %H:%M}")
+
+    # Choose between the current scrape and the full listing store
+    st.radio(
+        "Data source",
+        options=["Current scrape", "Listing store (history)"],
+        key="data_source",
+        help="The listing store holds every listing scraped so far and is queried page by page"
+    )
 
     # Client data upload
     st.header("Client Data")
     uploaded_file = st.file_uploader("Upload Client Data (CSV)", type=['csv'])
     if uploaded_file is not None:
         try:
-            client_df = pd.read_csv(uploaded_file)
-            st.session_state.client_data = client_df
+            data = uploaded_file.getvalue()
 
             # Let user select the address column
             st.subheader("Column Mapping")
-            address_columns = client_df.columns.tolist()
+            address_columns = read_client_columns(data)
             st.session_state.address_column = st.selectbox(
                 "Select the column containing property addresses",
                 options=address_columns,
@@ -217,21 +610,147 @@ with st.sidebar:
                 help="Choose the column that contains the property street addresses"
             )
 
+            # Parsed once per file content; reruns reuse the pruned frame and its address index
+            client_book = load_client_book(data, st.session_state.address_column)
+            st.session_state.client_book = client_book
+            st.session_state.client_data = client_book.frame
+            client_df = client_book.frame
+
+            st.session_state.match_threshold = st.slider(
+                "Address match threshold",
+                min_value=0.5,
+                max_value=1.0,
+                value=DEFAULT_MATCH_THRESHOLD,
+                step=0.01,
+                help="Minimum street-name similarity for a listing to count as a client match"
+            )
+
             st.success(f"Loaded {len(client_df)} client records")
         except Exception as e:
             st.error(f"Error loading client data: {str(e)}")
 
+    if st.session_state.client_book is not None:
+        with st.expander("Watchlist"):
+            st.caption("Poll newly updated terminated listings and record matches against these clients.")
+            watch_minutes = st.number_input("Poll every (minutes)", min_value=1, value=10, step=1)
+            # One monitor per client book for the whole process, shared by sessions with the same file
+            if not watchlist.is_watching(st.session_state.client_book):
+                if st.button("Start watching"):
+                    watchlist.start_background_watcher(
+                        st.session_state.client_book,
+                        interval=timedelta(minutes=watch_minutes),
+                        threshold=st.session_state.match_threshold
+                    )
+                    st.rerun()
+            else:
+                st.success("Watching for new matches")
+                if st.button("Stop watching", help="Stops the monitor for every session using this client file"):
+                    watchlist.stop_background_watcher(st.session_state.client_book)
+                    st.rerun()
+            recent_matches = watchlist.list_matches(limit=20, client_book=st.session_state.client_book)
+            if len(recent_matches) > 0:
+                st.dataframe(
+                    recent_matches[['detected_at', 'streetAddress', 'client_address', 'match_score', 'price']],
+                    hide_index=True
+                )
+
     # Start scraping button
     if st.button("Start Scraping", type="primary"):
         run_scraper()
+    if st.button("Incremental Refresh", help="Fetch only listings updated since the last sync and update the listing store"):
+        run_incremental_sync()
+
+    render_transfer_stats()
+
+    # Memory instrumentation
+    with st.expander("Memory"):
+        # tracemalloc is process-wide, so it is switched explicitly rather than per session
+        if memory.is_tracking():
+            if st.button("Stop allocation tracking", help="Stops tracemalloc for every session"):
+                memory.stop_tracking()
+                st.rerun()
+        elif st.button("Start allocation tracking",
+                       help="Run tracemalloc for every session to report traced memory and top allocation sites"):
+            memory.start_tracking()
+            st.rerun()
+        st.number_input(
+            "Memory ceiling (MB)",
+            min_value=0.0,
+            value=memory.DEFAULT_MEMORY_CEILING_MB or 0.0,
+            step=256.0,
+            key="memory_ceiling_mb",
+            help="Above this RSS, scrapes are browsed from the listing store instead of held in memory (0 = no ceiling)"
+        )
+        col1, col2 = st.columns(2)
+        rss, peak = memory.current_rss(), memory.peak_rss()
+        col1.metric("RSS (MB)", round(rss / (1024 * 1024), 1) if rss else "n/a")
+        col2.metric("Peak RSS (MB)", round(peak / (1024 * 1024), 1) if peak else "n/a")
+        # Sizing walks every object in the session, so only on request
+        if st.button("Measure session state"):
+            st.caption("Session state")
+            st.dataframe(pd.DataFrame(memory.session_state_sizes(st.session_state)), hide_index=True)
+        shared = datasets.registry_info()
+        if shared:
+            st.caption("Shared datasets")
+            st.dataframe(pd.DataFrame(shared), hide_index=True)
+        st.caption("Stage checkpoints")
+        st.dataframe(pd.DataFrame(memory.get_checkpoints()[-20:]), hide_index=True)
+        allocations = memory.top_allocations()
+        if allocations:
+            st.caption("Top allocation sites")
+            st.dataframe(pd.DataFrame(allocations), hide_index=True)
+
+    # Profiling controls
+    with st.expander("Profiling"):
+        st.checkbox("Profile the next scrape", key="profile_next_run",
+                    help="Time each pipeline stage and write a report under profiles/")
+        st.checkbox("Include cProfile", key="profile_cprofile",
+                    help="Also capture a cProfile of the app thread (slower)")
         
     # Verification button (only enabled if scraping is complete)
     if st.session_state.scraping_complete:
+        st.radio(
+            "Verification mode",
+            options=["Per listing", "Changed-since scan"],
+            key="verification_mode",
+            help="Changed-since scan pages through the area's listings updated since the scrape instead of requesting each listing"
+        )
+        st.number_input(
+            "Verification cache TTL (hours)",
+            min_value=0.0,
+            value=DEFAULT_VERIFICATION_TTL.total_seconds() / 3600,
+            step=1.0,
+            key="verification_ttl_hours",
+            help="Listings verified more recently than this are answered from the shared verification cache"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            st.number_input(
+                "Time budget (s)",
+                min_value=0,
+                value=0,
+                key="verification_max_seconds",
+                help="Stop verifying after this many seconds (0 = no limit)"
+            )
+        with col2:
+            st.number_input(
+                "Request budget",
+                min_value=0,
+                value=0,
+                key="verification_max_requests",
+                help="Stop verifying after this many API requests (0 = no limit)"
+            )
         if st.button("Verify Current Status", type="secondary", help="Check if terminated listings are still terminated today"):
             verify_listings()
 
 # Main content area
-if st.session_state.verification_complete and st.session_state.verified_data is not None:
+if st.session_state.data_source == "Listing store (history)":
+    render_listing_store()
+
+elif st.session_state.spilled:
+    render_listing_store(run_id=st.session_state.spilled)
+
+elif st.session_state.verification_complete and st.session_state.verified_data is not None:
     # Display verification results
     st.header("Verification Results")
     verified_df = st.session_state.verified_data
@@ -253,13 +772,6 @@ if st.session_state.verification_complete and st.session_state.verified_data is
     # Display detailed results
     st.subheader("Detailed Verification Results")
     
-    # Add a status indicator column
-    verified_df['Status Change'] = verified_df.apply(
-        lambda row: "✅ Still Terminated" if row.get('still_terminated', False) else 
-                   ("❌ Not Found" if not row.get('found', True) else "⚠️ No Longer Terminated"),
-        axis=1
-    )
-    
     # Display the dataframe
     st.dataframe(
         verified_df[[
@@ -275,36 +787,32 @@ if st.session_state.verification_complete and st.session_state.verified_data is
         st.session_state.verification_complete = False
     
     # Download buttons for verification results
-    col1, col2 = st.columns(2)
-    with col1:
-        st.download_button(
-            label="Download Verification JSON",
-            data=verified_df.to_json(orient='records'),
-            file_name="verification_results.json",
-            mime="application/json"
-        )
-    with col2:
-        st.download_button(
-            label="Download Verification CSV",
-            data=verified_df.to_csv(index=False),
-            file_name="verification_results.csv",
-            mime="text/csv"
-        )
+    render_downloads(verified_df, "verification_results", key="verification")
 
 elif st.session_state.scraping_complete and st.session_state.data is not None:
     df = st.session_state.data
 
     # Show comparison with client data if available
-    if st.session_state.client_data is not None and st.session_state.address_column is not None:
+    if st.session_state.client_book is not None:
         st.header("Matching Terminated Listings")
-        matches = find_matching_terminated_listings(df, st.session_state.client_data, st.session_state.address_column)
+        client_book = st.session_state.client_book
+        with span("address_matching"):
+            matches = find_fuzzy_matching_listings(
+                df,
+                client_book.frame,
+                client_book.address_columns,
+                threshold=st.session_state.match_threshold,
+                client_index=client_book.address_index
+            )
+        memory.checkpoint("address_matching")
 
         if len(matches) > 0:
             st.warning(f"Found {len(matches)} terminated listings matching your client addresses!")
             st.dataframe(
                 matches[[
                     'streetAddress', 'city', 'price', 'originalListPrice',
-                    'daysOnMarket', 'status', 'typeName'
+                    'daysOnMarket', 'status', 'typeName', 'matched_address_column',
+                    'match_score'
                 ]],
                 hide_index=True,
                 use_container_width=True
@@ -430,130 +938,106 @@ elif st.session_state.scraping_complete and st.session_state.data is not None:
     )
 
     # Download buttons
-    col1, col2 = st.columns(2)
-    with col1:
-        st.download_button(
-            label="Download JSON",
-            data=filtered_df.to_json(orient='records'),
-            file_name="real_estate_data.json",
-            mime="application/json"
-        )
-    with col2:
-        st.download_button(
-            label="Download CSV",
-            data=filtered_df.to_csv(index=False),
-            file_name="real_estate_data.csv",
-            mime="text/csv"
-        )
+    render_downloads(filtered_df, "real_estate_data", key="listings")
 
-    # Visualizations
-    st.header("Data Visualization")
+    with span("render_charts"):
+        # Visualizations
+        st.header("Data Visualization")
 
-    # Price Analysis
-    if 'price' in df.columns:
-        with st.expander("Price Analysis", expanded=True):
+        # Price Analysis
+        if 'price' in df.columns:
+            with st.expander("Price Analysis", expanded=True):
+                col1, col2 = st.columns(2)
+                with col1:
+                    if 'city' in df.columns:
+                        st.subheader("Average Price by City")
+                        city_prices = filtered_df.groupby('city')['price'].mean().round(2)
+                        fig_city = px.bar(
+                            x=city_prices.index,
+                            y=city_prices.values,
+                            title="Average Price by City",
+                            labels={'x': 'City', 'y': 'Average Price ($)'}
+                        )
+                        # Update layout for better visibility
+                        fig_city.update_layout(
+                            title_x=0.5,
+                            yaxis_tickformat='$,.0f',
+                            height=400,
+                            margin=dict(t=30)
+                        )
+                        st.plotly_chart(fig_city, use_container_width=True)
+
+                with col2:
+                    if 'typeName' in df.columns:
+                        st.subheader("Average Price by Property Type")
+                        type_prices = filtered_df.groupby('typeName')['price'].mean().round(2)
+                        fig_type = px.bar(
+                            x=type_prices.index,
+                            y=type_prices.values,
+                            title="Average Price by Property Type",
+                            labels={'x': 'Property Type', 'y': 'Average Price ($)'}
+                        )
+                        # Update layout for better visibility
+                        fig_type.update_layout(
+                            title_x=0.5,
+                            yaxis_tickformat='$,.0f',
+                            height=400,
+                            margin=dict(t=30)
+                        )
+                        st.plotly_chart(fig_type, use_container_width=True)
+
+        render_map(df, filtered_df)
+        render_price_analytics()
+
+        # Property Distribution
+        with st.expander("Property Distribution", expanded=True):
             col1, col2 = st.columns(2)
             with col1:
-                if 'city' in df.columns:
-                    st.subheader("Average Price by City")
-                    city_prices = filtered_df.groupby('city')['price'].mean().round(2)
-                    fig_city = px.bar(
-                        x=city_prices.index,
-                        y=city_prices.values,
-                        title="Average Price by City",
-                        labels={'x': 'City', 'y': 'Average Price ($)'}
+                if 'typeName' in df.columns:
+                    st.subheader("Property Types Distribution")
+                    type_counts = filtered_df['typeName'].value_counts()
+                    fig_type_pie = px.pie(
+                        values=type_counts.values,
+                        names=type_counts.index,
+                        title="Property Types Distribution"
                     )
-                    # Update layout for better visibility
-                    fig_city.update_layout(
+                    fig_type_pie.update_layout(
                         title_x=0.5,
-                        yaxis_tickformat='$,.0f',
                         height=400,
                         margin=dict(t=30)
                     )
-                    st.plotly_chart(fig_city, use_container_width=True)
+                    st.plotly_chart(fig_type_pie, use_container_width=True)
 
             with col2:
-                if 'typeName' in df.columns:
-                    st.subheader("Average Price by Property Type")
-                    type_prices = filtered_df.groupby('typeName')['price'].mean().round(2)
-                    fig_type = px.bar(
-                        x=type_prices.index,
-                        y=type_prices.values,
-                        title="Average Price by Property Type",
-                        labels={'x': 'Property Type', 'y': 'Average Price ($)'}
+                if 'style' in df.columns:
+                    st.subheader("Property Styles Distribution")
+                    style_counts = filtered_df['style'].value_counts()
+                    fig_style_pie = px.pie(
+                        values=style_counts.values,
+                        names=style_counts.index,
+                        title="Property Styles Distribution"
                     )
-                    # Update layout for better visibility
-                    fig_type.update_layout(
+                    fig_style_pie.update_layout(
                         title_x=0.5,
-                        yaxis_tickformat='$,.0f',
                         height=400,
                         margin=dict(t=30)
                     )
-                    st.plotly_chart(fig_type, use_container_width=True)
-
-    # Property Distribution
-    with st.expander("Property Distribution", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            if 'typeName' in df.columns:
-                st.subheader("Property Types Distribution")
-                type_counts = filtered_df['typeName'].value_counts()
-                fig_type_pie = px.pie(
-                    values=type_counts.values,
-                    names=type_counts.index,
-                    title="Property Types Distribution"
-                )
-                fig_type_pie.update_layout(
-                    title_x=0.5,
-                    height=400,
-                    margin=dict(t=30)
-                )
-                st.plotly_chart(fig_type_pie, use_container_width=True)
-
-        with col2:
-            if 'style' in df.columns:
-                st.subheader("Property Styles Distribution")
-                style_counts = filtered_df['style'].value_counts()
-                fig_style_pie = px.pie(
-                    values=style_counts.values,
-                    names=style_counts.index,
-                    title="Property Styles Distribution"
-                )
-                fig_style_pie.update_layout(
-                    title_x=0.5,
-                    height=400,
-                    margin=dict(t=30)
-                )
-                st.plotly_chart(fig_style_pie, use_container_width=True)
+                    st.plotly_chart(fig_style_pie, use_container_width=True)
 
-    # Neighborhoods Distribution
-    if 'neighborhoods' in df.columns and 'city' in df.columns:
-        st.header("Neighborhoods Distribution by City")
+        # Neighborhoods Distribution
+        if 'neighborhoods' in df.columns and 'city' in df.columns:
+            st.header("Neighborhoods Distribution by City")
 
-        # Get unique cities
-        cities = sorted(filtered_df['city'].unique())
+            # Get unique cities
+            cities = sorted(filtered_df['city'].unique())
 
-        # Create rows of two columns for each pair of cities
-        for i in range(0, len(cities), 2):
-            col1, col2 = st.columns(2)
+            # Create rows of two columns for each pair of cities
+            for i in range(0, len(cities), 2):
+                col1, col2 = st.columns(2)
 
-            # First city in the pair
-            with col1:
-                city = cities[i]
-                city_data = filtered_df[filtered_df['city'] == city]
-                if not city_data.empty and 'neighborhoods' in city_data.columns:
-                    neighborhood_counts = city_data['neighborhoods'].value_counts()
-                    fig = px.pie(
-                        values=neighborhood_counts.values,
-                        names=neighborhood_counts.index,
-                        title=f"Neighborhoods in {city}"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-
-            # Second city in the pair (if exists)
-            with col2:
-                if i + 1 < len(cities):
-                    city = cities[i + 1]
+                # First city in the pair
+                with col1:
+                    city = cities[i]
                     city_data = filtered_df[filtered_df['city'] == city]
                     if not city_data.empty and 'neighborhoods' in city_data.columns:
                         neighborhood_counts = city_data['neighborhoods'].value_counts()
@@ -564,5 +1048,35 @@ elif st.session_state.scraping_complete and st.session_state.data is not None:
                         )
                         st.plotly_chart(fig, use_container_width=True)
 
+                # Second city in the pair (if exists)
+                with col2:
+                    if i + 1 < len(cities):
+                        city = cities[i + 1]
+                        city_data = filtered_df[filtered_df['city'] == city]
+                        if not city_data.empty and 'neighborhoods' in city_data.columns:
+                            neighborhood_counts = city_data['neighborhoods'].value_counts()
+                            fig = px.pie(
+                                values=neighborhood_counts.values,
+                                names=neighborhood_counts.index,
+                                title=f"Neighborhoods in {city}"
+                            )
+                            st.plotly_chart(fig, use_container_width=True)
+
 elif not st.session_state.scraping_complete:
-    st.info("Select a date range and click 'Start Scraping' to begin data collection.")
\ No newline at end of file
+    st.info("Select a date range and click 'Start Scraping' to begin data collection.")
+
+if st.session_state.scraping_complete and st.session_state.data is not None:
+    memory.checkpoint("render")
+
+# Close this session's profiling run once the page has rendered, and show its report
+if st.session_state.get('profile_next_run'):
+    finished = finish_run()
+    if finished is not None:
+        st.session_state.profile_report = finished
+if st.session_state.get('profile_report'):
+    report = st.session_state.profile_report
+    with st.expander(f"Profiling Report ({report['elapsed_s']:.2f}s)"):
+        st.dataframe(pd.DataFrame(report['stages']), hide_index=True, use_container_width=True)
+        st.caption(f"Full report, flamegraph stacks and cProfile output: {report['path']}")
+        with open(f"{report['path']}/stages.folded", 'r') as f:
+            st.download_button("Download flamegraph stacks", data=f.read(), file_name="stages.folded")
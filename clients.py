@@ -0,0 +1,112 @@
+import io
+import re
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+from matching import build_client_address_index, detect_address_columns
+
+# Books parsed in this process, most recently used last
+MAX_CACHED_BOOKS = 4
+
+# Columns besides the street addresses that matching reads
+_SUPPORTING_COLUMN_PATTERN = re.compile(r'^Address \d+ - (Zip|City)$')
+
+_books = {}
+_books_lock = threading.Lock()
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+
+@dataclass(frozen=True)
+class ClientBook:
+    """A parsed client CSV: only the columns matching needs, plus their address index."""
+    key: tuple
+    frame: pd.DataFrame
+    address_columns: list
+    address_index: pd.DataFrame
+
+
+def content_hash(data):
+    """SHA-256 of a file's bytes, used to recognise the same upload across reruns."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_client_columns(data):
+    """Column names of a CSV without parsing its rows."""
+    return pd.read_csv(io.BytesIO(data), nrows=0).columns.tolist()
+
+
+def matching_columns(columns, address_column):
+    """
+    The columns client matching reads: every street address column and its
+    city and postal code.
+
+    :param columns: All column names of the client CSV.
+    :param address_column: Column selected by the user.
+    :return: List of column names in file order.
+    """
+    header = pd.DataFrame(columns=columns)
+    wanted = set(detect_address_columns(header, address_column))
+    return [
+        col for col in columns
+        if col in wanted or _SUPPORTING_COLUMN_PATTERN.match(str(col))
+    ]
+
+
+def _read_pruned(data, usecols):
+    """Parse only the given columns, all as strings so postal codes and unit numbers keep their zeros."""
+    dtypes = {col: "string" for col in usecols}
+    try:
+        return pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtypes, engine=CSV_ENGINE)
+    except Exception as e:
+        if CSV_ENGINE == "c":
+            raise
+        logging.warning(f"{CSV_ENGINE} CSV engine failed, falling back to the C engine: {e}")
+        return pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=dtypes)
+
+
+def load_client_book(data, address_column):
+    """
+    Parse a client CSV once per content and address column.
+
+    Repeated calls with the same bytes return the cached book without
+    re-reading the file or rebuilding its address index.
+
+    :param data: Raw CSV bytes.
+    :param address_column: Column selected by the user as the primary street address.
+    :return: ClientBook.
+    """
+    key = (content_hash(data), address_column)
+    with _books_lock:
+        book = _books.pop(key, None)
+        if book is not None:
+            _books[key] = book
+            return book
+
+    usecols = matching_columns(read_client_columns(data), address_column)
+    frame = _read_pruned(data, usecols)
+    address_columns = detect_address_columns(frame, address_column)
+    book = ClientBook(
+        key=key,
+        frame=frame,
+        address_columns=address_columns,
+        address_index=build_client_address_index(frame, address_columns)
+    )
+    logging.info(
+        f"Parsed client book: {len(frame)} rows, {len(usecols)} columns, "
+        f"{len(book.address_index)} indexed addresses"
+    )
+
+    with _books_lock:
+        _books[key] = book
+        while len(_books) > MAX_CACHED_BOOKS:
+            _books.pop(next(iter(_books)))
+    return book
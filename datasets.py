@@ -0,0 +1,136 @@
+import os
+import logging
+import threading
+import weakref
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+DATASET_DIR = os.path.join("cache", "datasets")
+
+# Shared frames must never be modified in place by a session. Copy-on-write is
+# always on from pandas 3, where the option is deprecated; pandas 2 needs it set.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Process-wide registry: cache key -> {'frame': DataFrame, 'handles': int}
+_registry = {}
+_registry_lock = threading.Lock()
+# Loads in progress, so concurrent sessions don't parse the same dataset twice
+_loading = {}
+# Seconds between on_wait calls while another session loads a dataset
+WAIT_INTERVAL = 0.5
+
+
+class DatasetHandle:
+    """
+    A session's reference to a shared dataset.
+
+    The frame is shared by every session holding the same key; with
+    copy-on-write enabled, any change a session makes produces its own copy.
+    The registry entry is evicted once every handle is released or garbage
+    collected.
+    """
+
+    def __init__(self, key, frame):
+        self.key = key
+        self.frame = frame
+        self._finalizer = weakref.finalize(self, _release, key)
+
+    def release(self):
+        """Drop this session's reference now rather than at garbage collection."""
+        self.frame = None
+        self._finalizer()
+
+
+def _release(key):
+    with _registry_lock:
+        entry = _registry.get(key)
+        if entry is None:
+            return
+        entry['handles'] -= 1
+        if entry['handles'] <= 0:
+            del _registry[key]
+            logging.info(f"Evicted shared dataset {key}")
+
+
+def _to_arrow_backed(key, frame):
+    """
+    Persist a frame as an Arrow IPC file and reload it memory-mapped, so its
+    column buffers live in the page cache rather than the Python heap.
+    Returns the original frame if pyarrow is unavailable or the data can't be converted.
+    """
+    if pa is None:
+        return frame
+    try:
+        os.makedirs(DATASET_DIR, exist_ok=True)
+        path = os.path.join(DATASET_DIR, f"{key}.arrow")
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.OSFile(temp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, path)
+        mapped = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        return mapped.to_pandas(types_mapper=pd.ArrowDtype)
+    except Exception as e:
+        logging.warning(f"Keeping dataset {key} as a pandas frame: {e}")
+        return frame
+
+
+def acquire(key, loader, refresh=False, use_arrow=True, on_wait=None):
+    """
+    Get a handle on the shared dataset for a key, loading it once per process.
+
+    :param key: Dataset key, normally the scrape's cache key.
+    :param loader: Callable returning a DataFrame, or None if there is no data.
+    :param refresh: Reload even if the dataset is already shared; existing
+                    handles keep the previous frame.
+    :param use_arrow: Back the shared frame with a memory-mapped Arrow file when pyarrow is available.
+    :param on_wait: Optional callable run every WAIT_INTERVAL seconds while another session loads the key.
+    :return: DatasetHandle, or None if the loader returned no data.
+    """
+    while True:
+        with _registry_lock:
+            entry = _registry.get(key)
+            if entry is not None and not refresh:
+                entry['handles'] += 1
+                return DatasetHandle(key, entry['frame'])
+            pending = _loading.get(key)
+            if pending is None:
+                pending = _loading[key] = threading.Event()
+                break
+        # Another session is loading this key; wait and use its result
+        while not pending.wait(WAIT_INTERVAL):
+            if on_wait is not None:
+                on_wait()
+        refresh = False
+
+    try:
+        frame = loader()
+        if frame is None:
+            return None
+        if use_arrow:
+            frame = _to_arrow_backed(key, frame)
+        with _registry_lock:
+            entry = _registry.get(key)
+            handles = entry['handles'] if entry is not None else 0
+            _registry[key] = {'frame': frame, 'handles': handles + 1}
+        logging.info(f"Shared dataset {key} loaded ({len(frame)} rows)")
+        return DatasetHandle(key, frame)
+    finally:
+        with _registry_lock:
+            _loading.pop(key, None)
+        pending.set()
+
+
+def registry_info():
+    """Keys currently shared, with row counts and live handle counts."""
+    with _registry_lock:
+        return [
+            {'key': key, 'rows': len(entry['frame']), 'handles': entry['handles']}
+            for key, entry in _registry.items()
+        ]
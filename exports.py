@@ -0,0 +1,180 @@
+import io
+import gzip
+import logging
+import threading
+
+from profiling import span
+from scraper import atomic_write_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Rows serialized per chunk, so an export never holds the whole file as one string
+EXPORT_CHUNK_ROWS = 20_000
+
+SNAPSHOT_FILE = 'latest_scrape.json'
+
+
+def available_formats():
+    """Export formats usable with the installed libraries, mapped to (file extension, mime type)."""
+    formats = {
+        'CSV': ('csv', 'text/csv'),
+        'CSV (gzip)': ('csv.gz', 'application/gzip'),
+        'JSON': ('json', 'application/json'),
+        'JSON (gzip)': ('json.gz', 'application/gzip'),
+    }
+    if zstandard is not None:
+        formats['CSV (zstd)'] = ('csv.zst', 'application/zstd')
+        formats['JSON (zstd)'] = ('json.zst', 'application/zstd')
+    if pq is not None:
+        formats['Parquet'] = ('parquet', 'application/vnd.apache.parquet')
+    return formats
+
+
+def iter_csv_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a frame as CSV text, header first, chunk_rows rows at a time."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0)
+
+
+def iter_json_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a frame as one JSON array of records, chunk_rows records at a time."""
+    yield "["
+    for start in range(0, len(df), chunk_rows):
+        records = df.iloc[start:start + chunk_rows].to_json(orient='records')
+        yield ("," if start else "") + records[1:-1]
+    yield "]"
+
+
+def _compressed_writer(sink, fmt):
+    """Wrap a binary sink in the compressor a format asks for; returns (writer, needs_close)."""
+    if fmt.endswith('(gzip)'):
+        return gzip.GzipFile(fileobj=sink, mode='wb'), True
+    if fmt.endswith('(zstd)'):
+        return zstandard.ZstdCompressor().stream_writer(sink, closefd=False), True
+    return sink, False
+
+
+def _parquet_compatible(table):
+    """
+    Replace columns Parquet can't store (structs with no fields, from always-empty
+    objects) with nulls, and drop pandas dtype metadata so any reader can load the file.
+    """
+    table = table.replace_schema_metadata(None)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_struct(field.type) and field.type.num_fields == 0:
+            table = table.set_column(i, pa.field(field.name, pa.string()), pa.nulls(len(table), pa.string()))
+    return table
+
+
+def write_export(df, fmt, sink, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Stream a frame into a binary file object in one of the available formats.
+
+    :param df: DataFrame to export.
+    :param fmt: Key of available_formats().
+    :param sink: Writable binary file object.
+    :param chunk_rows: Rows serialized at a time.
+    """
+    if fmt not in available_formats():
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    if fmt == 'Parquet':
+        # One columnar conversion (zero-copy for Arrow-backed frames), written in row groups
+        table = _parquet_compatible(pa.Table.from_pandas(df, preserve_index=False))
+        with pq.ParquetWriter(sink, table.schema, compression='zstd') as writer:
+            writer.write_table(table, row_group_size=chunk_rows)
+        return
+
+    chunks = iter_csv_chunks(df, chunk_rows) if fmt.startswith('CSV') else iter_json_chunks(df, chunk_rows)
+    writer, needs_close = _compressed_writer(sink, fmt)
+    for chunk in chunks:
+        writer.write(chunk.encode('utf-8'))
+    if needs_close:
+        writer.close()
+
+
+def export_frame(df, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Export a frame into an in-memory buffer.
+
+    Meant to be passed (wrapped in a lambda) as the data of st.download_button,
+    so the export is only built when someone clicks. Streamlit only accepts
+    str, bytes or BytesIO-like data from that callable, so the chunks are
+    written straight into a BytesIO.
+
+    :return: io.BytesIO positioned at the start.
+    """
+    sink = io.BytesIO()
+    with span(f"export_{fmt}"):
+        write_export(df, fmt, sink, chunk_rows)
+    sink.seek(0)
+    logging.info(f"Exported {len(df)} rows as {fmt}")
+    return sink
+
+
+# Background writer for the latest scrape snapshot. Only the newest pending
+# snapshot is kept, so back-to-back scrapes don't queue up stale writes.
+_snapshot_lock = threading.Lock()
+_snapshot_pending = None
+_snapshot_wakeup = threading.Event()
+_snapshot_idle = threading.Event()
+_snapshot_idle.set()
+_snapshot_thread = None
+
+
+def _snapshot_worker():
+    global _snapshot_pending
+    while True:
+        _snapshot_wakeup.wait()
+        with _snapshot_lock:
+            job, _snapshot_pending = _snapshot_pending, None
+            _snapshot_wakeup.clear()
+            if job is None:
+                _snapshot_idle.set()
+                continue
+        path, data, indent = job
+        try:
+            with span("save_snapshot"):
+                # json.dump streams to the file, so no second full-size string is built
+                atomic_write_json(path, data, indent=indent)
+            logging.info(f"Snapshot written to {path}: {len(data)} records")
+        except Exception as e:
+            logging.error(f"Error writing snapshot {path}: {e}")
+        with _snapshot_lock:
+            if _snapshot_pending is None:
+                _snapshot_idle.set()
+
+
+def save_snapshot_async(data, path=SNAPSHOT_FILE, indent=4):
+    """
+    Write a JSON snapshot on a background thread and return immediately.
+
+    The records are written as passed, so callers must not mutate them afterwards.
+
+    :param data: JSON-serializable records.
+    :param path: Destination file, replaced atomically.
+    :param indent: JSON indentation.
+    """
+    global _snapshot_pending, _snapshot_thread
+    with _snapshot_lock:
+        _snapshot_pending = (path, data, indent)
+        _snapshot_idle.clear()
+        if _snapshot_thread is None:
+            _snapshot_thread = threading.Thread(target=_snapshot_worker, name="snapshot-writer", daemon=True)
+            _snapshot_thread.start()
+        _snapshot_wakeup.set()
+
+
+def wait_for_snapshot(timeout=None):
+    """Block until pending snapshot writes finish; returns False on timeout."""
+    return _snapshot_idle.wait(timeout)
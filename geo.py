@@ -0,0 +1,157 @@
+import math
+import logging
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from matching import postal_fsa
+
+EARTH_RADIUS_KM = 6371.0088
+
+# About 1.1 km north-south; fine enough that a radius query touches few cells
+DEFAULT_CELL_DEGREES = 0.01
+
+# Map bins: about 2 km cells keep a GTA-wide view to a few thousand points
+DEFAULT_BIN_DEGREES = 0.02
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lats2, lons2 = np.radians(lats), np.radians(lons)
+    a = (np.sin((lats2 - lat1) / 2) ** 2
+         + math.cos(lat1) * np.cos(lats2) * np.sin((lons2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _coordinates(df):
+    """Latitude and longitude of a frame as float arrays, NaN where missing or zero."""
+    if 'latitude' not in df.columns or 'longitude' not in df.columns:
+        return np.full(len(df), np.nan), np.full(len(df), np.nan)
+    lats = pd.to_numeric(df['latitude'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    lons = pd.to_numeric(df['longitude'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    # Listings without a geocode come back as 0, 0
+    missing = (lats == 0) & (lons == 0)
+    return np.where(missing, np.nan, lats), np.where(missing, np.nan, lons)
+
+
+class GridIndex:
+    """
+    Uniform latitude/longitude grid over a frame's listings.
+
+    Each cell holds the row positions of the listings inside it, so box and
+    radius queries only look at the cells they overlap.
+    """
+
+    def __init__(self, df, cell_degrees=DEFAULT_CELL_DEGREES):
+        self.df = df
+        self.cell_degrees = cell_degrees
+        self.lats, self.lons = _coordinates(df)
+        located = np.flatnonzero(~np.isnan(self.lats) & ~np.isnan(self.lons))
+        cell_rows = np.floor(self.lats[located] / cell_degrees).astype(np.int64)
+        cell_cols = np.floor(self.lons[located] / cell_degrees).astype(np.int64)
+        cells = defaultdict(list)
+        for row, col, position in zip(cell_rows.tolist(), cell_cols.tolist(), located.tolist()):
+            cells[(row, col)].append(position)
+        self.cells = {cell: np.array(positions) for cell, positions in cells.items()}
+        self.located = len(located)
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        """Row positions in every cell overlapping the box."""
+        d = self.cell_degrees
+        rows = range(math.floor(min_lat / d), math.floor(max_lat / d) + 1)
+        cols = range(math.floor(min_lon / d), math.floor(max_lon / d) + 1)
+        # A huge box is cheaper to answer by walking the occupied cells
+        if len(rows) * len(cols) > len(self.cells):
+            chunks = [
+                positions for (row, col), positions in self.cells.items()
+                if rows.start <= row < rows.stop and cols.start <= col < cols.stop
+            ]
+        else:
+            chunks = [self.cells[(row, col)] for row in rows for col in cols if (row, col) in self.cells]
+        return np.concatenate(chunks) if chunks else np.array([], dtype=np.int64)
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Listings inside a bounding box.
+
+        :return: DataFrame of the matching rows.
+        """
+        positions = self._candidates(min_lat, min_lon, max_lat, max_lon)
+        lats, lons = self.lats[positions], self.lons[positions]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return self.df.iloc[np.sort(positions[inside])]
+
+    def radius(self, lat, lon, km):
+        """
+        Listings within a distance of a point, nearest first.
+
+        :param lat: Latitude of the centre.
+        :param lon: Longitude of the centre.
+        :param km: Radius in kilometres.
+        :return: DataFrame of the matching rows with a 'distance_km' column.
+        """
+        lat_delta = math.degrees(km / EARTH_RADIUS_KM)
+        lon_delta = lat_delta / max(math.cos(math.radians(lat)), 1e-6)
+        positions = self._candidates(lat - lat_delta, lon - lon_delta, lat + lat_delta, lon + lon_delta)
+        distances = haversine_km(lat, lon, self.lats[positions], self.lons[positions])
+        within = distances <= km
+        order = np.argsort(distances[within], kind='stable')
+        result = self.df.iloc[positions[within][order]].copy()
+        result['distance_km'] = np.round(distances[within][order], 3)
+        return result
+
+
+def build_index(df, cell_degrees=DEFAULT_CELL_DEGREES):
+    """Build a GridIndex over a frame's latitude/longitude columns."""
+    index = GridIndex(df, cell_degrees)
+    logging.info(f"Spatial index: {index.located} of {len(df)} listings located in {len(index.cells)} cells")
+    return index
+
+
+def postal_centroids(df):
+    """
+    Mean listing position per postal FSA, a stand-in for postal code geocoding.
+
+    :return: DataFrame indexed by FSA with 'latitude', 'longitude' and 'listings'.
+    """
+    lats, lons = _coordinates(df)
+    if 'postalCode' not in df.columns:
+        return pd.DataFrame(columns=['latitude', 'longitude', 'listings'])
+    frame = pd.DataFrame({
+        'fsa': [postal_fsa(code) for code in df['postalCode'].tolist()],
+        'latitude': lats,
+        'longitude': lons,
+    }).dropna()
+    frame = frame[frame['fsa'] != ""]
+    return frame.groupby('fsa').agg(
+        latitude=('latitude', 'mean'), longitude=('longitude', 'mean'), listings=('latitude', 'size')
+    )
+
+
+def bin_listings(df, bin_degrees=DEFAULT_BIN_DEGREES, value_column='price'):
+    """
+    Aggregate listings into grid cells for a map, instead of sending every point.
+
+    :param df: Listings with latitude/longitude.
+    :param bin_degrees: Cell size in degrees.
+    :param value_column: Numeric column summarised per cell.
+    :return: DataFrame with the cell centre, 'listings' and the cell's median value.
+    """
+    lats, lons = _coordinates(df)
+    frame = pd.DataFrame({
+        'cell_lat': np.floor(lats / bin_degrees),
+        'cell_lon': np.floor(lons / bin_degrees),
+    })
+    if value_column in df.columns:
+        frame['value'] = pd.to_numeric(df[value_column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    else:
+        frame['value'] = np.nan
+    frame = frame.dropna(subset=['cell_lat', 'cell_lon'])
+    bins = frame.groupby(['cell_lat', 'cell_lon']).agg(
+        listings=('value', 'size'), median=('value', 'median')
+    ).reset_index()
+    bins['latitude'] = (bins['cell_lat'] + 0.5) * bin_degrees
+    bins['longitude'] = (bins['cell_lon'] + 0.5) * bin_degrees
+    return bins.rename(columns={'median': f"median_{value_column}"}).drop(columns=['cell_lat', 'cell_lon'])
@@ -0,0 +1,335 @@
+import os
+import json
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+HISTORY_DB_FILE = os.path.join("cache", "history.db")
+
+# Fields whose changes are recorded; everything else about a listing is static or cosmetic
+TRACKED_FIELDS = [
+    'status',
+    'displayStatus',
+    'availability',
+    'price',
+    'listPrice',
+    'originalListPrice',
+    'priceLow',
+    'priceChange',
+    'daysOnMarket',
+    'modified',
+]
+
+# Listing IDs looked up per query when diffing a batch against the current state
+_LOOKUP_CHUNK = 500
+
+# record_observation writes a new base snapshot once either many changes or a
+# long time have passed since the last one, and the oldest snapshots beyond
+# MAX_SNAPSHOTS are dropped. The change log itself is kept unless pruned with
+# compact(prune=True), so as-of queries before the oldest retained snapshot
+# still work by replaying it from the start.
+COMPACT_EVERY_CHANGES = 100_000
+COMPACT_INTERVAL = timedelta(days=7)
+MAX_SNAPSHOTS = 4
+
+
+def connect(db_path=HISTORY_DB_FILE):
+    """Open the history store, creating its tables if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Append-only log: one row per field that changed between observations
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS changes ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "listingID TEXT NOT NULL, "
+        "field TEXT NOT NULL, "
+        "old_value TEXT, "
+        "new_value TEXT, "
+        "observed_at TEXT NOT NULL, "
+        "run_id TEXT)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_listing ON changes (listingID, observed_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_observed ON changes (observed_at)")
+    # Latest known tracked fields per listing, the baseline new observations are diffed against
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS current ("
+        "listingID TEXT PRIMARY KEY, state TEXT NOT NULL, observed_at TEXT NOT NULL)"
+    )
+    # Compacted base states, so as-of queries replay only the changes after the nearest snapshot
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS snapshots ("
+        "snapshot_at TEXT NOT NULL, listingID TEXT NOT NULL, state TEXT NOT NULL, "
+        "PRIMARY KEY (snapshot_at, listingID))"
+    )
+    return conn
+
+
+def _encode(value):
+    """Store every value as JSON text so '1499900' and 1499900 diff the same way each time."""
+    return None if value is None else json.dumps(value)
+
+
+def _tracked_state(listing):
+    return {field: _encode(listing.get(field)) for field in TRACKED_FIELDS if listing.get(field) is not None}
+
+
+def _load_current(conn, listing_ids):
+    states = {}
+    for start in range(0, len(listing_ids), _LOOKUP_CHUNK):
+        chunk = listing_ids[start:start + _LOOKUP_CHUNK]
+        rows = conn.execute(
+            f"SELECT listingID, state FROM current WHERE listingID IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall()
+        states.update((listing_id, json.loads(state)) for listing_id, state in rows)
+    return states
+
+
+def record_observation(listings, observed_at=None, run_id=None, db_path=HISTORY_DB_FILE):
+    """
+    Append the field-level changes in a batch of listings to the change log.
+
+    A listing seen for the first time logs each tracked field with no old
+    value; after that only fields whose value differs from the last
+    observation are logged. Listings missing from a batch are left as they
+    were, since a date-windowed scrape doesn't see every listing. A new
+    snapshot is compacted once COMPACT_EVERY_CHANGES changes or
+    COMPACT_INTERVAL have passed since the last one.
+
+    :param listings: Listing dictionaries from the API.
+    :param observed_at: When the listings were fetched (default now).
+    :param run_id: Scrape that produced them, e.g. its cache key.
+    :param db_path: Path to the history database.
+    :return: Number of changes recorded.
+    """
+    observed_at = (observed_at or datetime.now()).isoformat()
+    latest = {}
+    for listing in listings:
+        if listing.get('listingID') is not None:
+            latest[str(listing['listingID'])] = _tracked_state(listing)
+    if not latest:
+        return 0
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            previous_states = _load_current(conn, list(latest))
+            changes = []
+            updated = []
+            for listing_id, state in latest.items():
+                previous = previous_states.get(listing_id, {})
+                if state == previous:
+                    continue
+                for field in TRACKED_FIELDS:
+                    old, new = previous.get(field), state.get(field)
+                    if old != new:
+                        changes.append((listing_id, field, old, new, observed_at, run_id))
+                updated.append((listing_id, json.dumps(state), observed_at))
+            conn.executemany(
+                "INSERT INTO changes (listingID, field, old_value, new_value, observed_at, run_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                changes
+            )
+            conn.executemany("INSERT OR REPLACE INTO current (listingID, state, observed_at) VALUES (?, ?, ?)", updated)
+        due = changes and _compaction_due(conn, datetime.fromisoformat(observed_at))
+    finally:
+        conn.close()
+    logging.info(f"History: {len(changes)} field changes across {len(updated)} of {len(latest)} listings")
+    if due:
+        compact(at=datetime.fromisoformat(observed_at), db_path=db_path)
+    return len(changes)
+
+
+def _compaction_due(conn, now):
+    """True once COMPACT_EVERY_CHANGES changes or COMPACT_INTERVAL have passed since the latest snapshot."""
+    last_at = conn.execute("SELECT MAX(snapshot_at) FROM snapshots").fetchone()[0]
+    if last_at is None:
+        first_at = conn.execute("SELECT MIN(observed_at) FROM changes").fetchone()[0]
+        if first_at is not None and now - datetime.fromisoformat(first_at) >= COMPACT_INTERVAL:
+            return True
+    elif now - datetime.fromisoformat(last_at) >= COMPACT_INTERVAL:
+        return True
+    pending = conn.execute("SELECT COUNT(*) FROM changes WHERE observed_at > ?", (last_at or "",)).fetchone()[0]
+    return pending >= COMPACT_EVERY_CHANGES
+
+
+def _decode_states(states):
+    """Turn {listingID: {field: json}} into a DataFrame with one column per tracked field."""
+    rows = [
+        {'listingID': listing_id, **{field: json.loads(value) for field, value in state.items() if value is not None}}
+        for listing_id, state in states.items()
+    ]
+    return pd.DataFrame(rows, columns=['listingID', *TRACKED_FIELDS])
+
+
+def _states_as_of(conn, when, listing_ids=None):
+    """Encoded tracked fields per listing as of `when`: nearest snapshot plus the changes since."""
+    id_filter, id_params = "", []
+    if listing_ids is not None:
+        id_filter = f"AND listingID IN ({', '.join('?' for _ in listing_ids)})"
+        id_params = list(listing_ids)
+
+    row = conn.execute("SELECT MAX(snapshot_at) FROM snapshots WHERE snapshot_at <= ?", (when,)).fetchone()
+    base_at = row[0]
+    states = {}
+    if base_at is not None:
+        for listing_id, state in conn.execute(
+            f"SELECT listingID, state FROM snapshots WHERE snapshot_at = ? {id_filter}", [base_at, *id_params]
+        ):
+            states[listing_id] = json.loads(state)
+
+    # Last value of each field between the snapshot and `when`
+    replay = conn.execute(
+        "SELECT listingID, field, new_value FROM ("
+        " SELECT listingID, field, new_value, ROW_NUMBER() OVER ("
+        "  PARTITION BY listingID, field ORDER BY observed_at DESC, id DESC) AS rn"
+        f" FROM changes WHERE observed_at > ? AND observed_at <= ? {id_filter}"
+        ") WHERE rn = 1",
+        [base_at or "", when, *id_params]
+    )
+    for listing_id, field, new_value in replay:
+        state = states.setdefault(listing_id, {})
+        if new_value is None:
+            state.pop(field, None)
+        else:
+            state[field] = new_value
+    return states
+
+
+def state_as_of(when, listing_ids=None, db_path=HISTORY_DB_FILE):
+    """
+    Reconstruct the tracked fields of every listing as they were known at a point in time.
+
+    Starts from the latest compacted snapshot at or before `when` and
+    replays only the changes logged since.
+
+    :param when: Datetime (or ISO string) to reconstruct.
+    :param listing_ids: Optional listing IDs to restrict the result to.
+    :param db_path: Path to the history database.
+    :return: DataFrame with listingID and the tracked fields; listings first seen after `when` are absent.
+    """
+    when = when.isoformat() if isinstance(when, datetime) else str(when)
+    if listing_ids is not None:
+        listing_ids = [str(listing_id) for listing_id in listing_ids]
+    conn = connect(db_path)
+    try:
+        states = _states_as_of(conn, when, listing_ids)
+    finally:
+        conn.close()
+    return _decode_states(states)
+
+
+def transitions(listing_id, fields=None, db_path=HISTORY_DB_FILE):
+    """
+    Every recorded change of one listing, oldest first.
+
+    :param listing_id: Listing to look up.
+    :param fields: Optional list of tracked fields to restrict to.
+    :param db_path: Path to the history database.
+    :return: DataFrame with observed_at, field, old_value, new_value and run_id.
+    """
+    params = [str(listing_id)]
+    field_filter = ""
+    if fields:
+        field_filter = f"AND field IN ({', '.join('?' for _ in fields)})"
+        params.extend(fields)
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT observed_at, field, old_value, new_value, run_id FROM changes "
+            f"WHERE listingID = ? {field_filter} ORDER BY observed_at, id",
+            params
+        ).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(
+        [
+            (observed_at, field,
+             json.loads(old) if old is not None else None,
+             json.loads(new) if new is not None else None,
+             run_id)
+            for observed_at, field, old, new, run_id in rows
+        ],
+        columns=['observed_at', 'field', 'old_value', 'new_value', 'run_id']
+    )
+
+
+def compact(at=None, prune=False, keep=MAX_SNAPSHOTS, db_path=HISTORY_DB_FILE):
+    """
+    Write a base snapshot of every listing's state at a point in time.
+
+    Runs automatically from record_observation when one is due; only the
+    newest `keep` snapshots are retained.
+
+    :param at: Snapshot time (default now).
+    :param prune: Also delete the changes the snapshot now covers. As-of
+                  queries after the snapshot are unaffected, but transitions
+                  before it are lost.
+    :param keep: Number of most recent snapshots to keep; older ones are deleted.
+    :param db_path: Path to the history database.
+    :return: Number of listings in the snapshot.
+    """
+    at = (at or datetime.now()).isoformat()
+    conn = connect(db_path)
+    try:
+        with conn:
+            rows = [(at, listing_id, json.dumps(state)) for listing_id, state in _states_as_of(conn, at).items()]
+            conn.executemany("INSERT OR REPLACE INTO snapshots (snapshot_at, listingID, state) VALUES (?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM snapshots WHERE snapshot_at NOT IN ("
+                " SELECT DISTINCT snapshot_at FROM snapshots ORDER BY snapshot_at DESC LIMIT ?)",
+                (keep,)
+            )
+            if prune:
+                conn.execute("DELETE FROM changes WHERE observed_at <= ?", (at,))
+        if prune:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    logging.info(f"History snapshot at {at}: {len(rows)} listings" + (" (changes pruned)" if prune else ""))
+    return len(rows)
+
+
+def storage_stats(db_path=HISTORY_DB_FILE):
+    """Row counts of the change log, snapshots and current states, and the database size in MB."""
+    conn = connect(db_path)
+    try:
+        stats = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ('changes', 'snapshots', 'current')
+        }
+        stats['snapshot_count'] = conn.execute("SELECT COUNT(DISTINCT snapshot_at) FROM snapshots").fetchone()[0]
+    finally:
+        conn.close()
+    stats['size_mb'] = round(os.path.getsize(db_path) / (1024 * 1024), 2)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query and compact the listing change history.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    listing_parser = subparsers.add_parser("listing", help="Show every change of one listing")
+    listing_parser.add_argument("listing_id")
+
+    asof_parser = subparsers.add_parser("asof", help="Show listing states as of a date")
+    asof_parser.add_argument("when", help="ISO date or datetime")
+
+    compact_parser = subparsers.add_parser("compact", help="Write a base snapshot")
+    compact_parser.add_argument("--prune", action="store_true", help="Delete changes covered by the snapshot")
+    compact_parser.add_argument("--keep", type=int, default=MAX_SNAPSHOTS, help="Snapshots to retain")
+
+    subparsers.add_parser("stats", help="Show storage statistics")
+
+    args = parser.parse_args()
+    if args.command == "listing":
+        print(transitions(args.listing_id).to_string(index=False))
+    elif args.command == "asof":
+        print(state_as_of(datetime.fromisoformat(args.when)).to_string(index=False))
+    elif args.command == "compact":
+        compact(prune=args.prune, keep=args.keep)
+    elif args.command == "stats":
+        print(storage_stats())
@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+from scraper import (
+    build_date_ranges,
+    fetch_all_pages_for_date_range,
+    get_cache_key,
+    get_query_key,
+    persist_listings,
+    save_to_cache,
+)
+from logconfig import log_context
+
+QUEUE_DB_FILE = os.path.join("cache", "jobs.db")
+RESULTS_DIR = os.path.join("cache", "jobs")
+DEFAULT_LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+
+
+def connect(db_path=QUEUE_DB_FILE):
+    """Open the job queue, creating its table if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    # isolation_level=None lets us issue BEGIN IMMEDIATE for atomic leases
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "run_id TEXT NOT NULL, "
+        "window_start TEXT NOT NULL, "
+        "window_end TEXT NOT NULL, "
+        "query_params TEXT, "
+        "state TEXT NOT NULL DEFAULT 'pending', "
+        "attempts INTEGER NOT NULL DEFAULT 0, "
+        "lease_owner TEXT, "
+        "lease_expires REAL, "
+        "result_path TEXT, "
+        "error TEXT, "
+        "UNIQUE (run_id, window_start, window_end))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, lease_expires)")
+    return conn
+
+
+def enqueue_date_windows(start_date, end_date, delta=timedelta(days=1), query_params=None, db_path=QUEUE_DB_FILE):
+    """
+    Queue one job per date window of a scrape.
+
+    :param start_date: The most recent date to fetch.
+    :param end_date: The oldest date to fetch.
+    :param delta: Span of each window.
+    :param query_params: Search parameters to use instead of base_params.
+    :param db_path: Path to the queue database.
+    :return: The run ID, which is also the cache key the merge writes to. Runs of
+             other search parameters get a hash of them appended, so they never
+             share jobs or a cache entry with the base query.
+    """
+    run_id = get_cache_key(start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'))
+    if query_params:
+        run_id = f"{run_id}_{get_query_key(query_params)}"
+    params_json = json.dumps(query_params) if query_params else None
+    date_ranges = build_date_ranges(start_date, end_date, delta)
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO jobs (run_id, window_start, window_end, query_params) VALUES (?, ?, ?, ?)",
+            [(run_id, dr[0], dr[1], params_json) for dr in date_ranges]
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    logging.info(f"Queued {len(date_ranges)} date windows for run {run_id}")
+    return run_id
+
+
+def lease_job(worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, db_path=QUEUE_DB_FILE):
+    """
+    Atomically claim the next pending job, or a leased job whose lease has expired.
+
+    An expired lease counts as a failed attempt, so a job whose worker keeps
+    dying is marked failed after MAX_ATTEMPTS instead of being re-leased forever.
+
+    :return: Job row as a dictionary, or None if there is nothing to do.
+    """
+    now = time.time()
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        while True:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            if row['state'] != 'leased':
+                break
+            if row['attempts'] < MAX_ATTEMPTS:
+                logging.warning(f"Reclaiming job {row['id']} from expired lease held by {row['lease_owner']}")
+                break
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, error = ? WHERE id = ?",
+                (f"Lease expired on all {row['attempts']} attempts, last held by {row['lease_owner']}", row['id'])
+            )
+            logging.error(f"Job {row['id']} failed: lease expired on all {row['attempts']} attempts")
+        conn.execute(
+            "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+            "WHERE id = ?",
+            (worker_id, now + lease_seconds, row['id'])
+        )
+        conn.execute("COMMIT")
+        return dict(row)
+    finally:
+        conn.close()
+
+
+def ack_job(job, worker_id, listings, db_path=QUEUE_DB_FILE):
+    """
+    Store a job's listings and mark it done, provided this worker still holds the lease.
+
+    :return: True if the ack was accepted.
+    """
+    run_dir = os.path.join(RESULTS_DIR, job['run_id'])
+    os.makedirs(run_dir, exist_ok=True)
+    # Each worker writes its own file so a late ack can't clobber the accepted one
+    safe_worker_id = "".join(c if c.isalnum() else "_" for c in worker_id)
+    result_path = os.path.join(run_dir, f"{job['id']}.{safe_worker_id}.json")
+    temp_path = f"{result_path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(listings, f)
+    os.replace(temp_path, result_path)
+
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = 'done', result_path = ?, lease_expires = NULL "
+            "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+            (result_path, job['id'], worker_id)
+        )
+        accepted = cursor.rowcount == 1
+    finally:
+        conn.close()
+    if not accepted:
+        os.remove(result_path)
+        logging.warning(f"Ack for job {job['id']} rejected: lease no longer held by {worker_id}")
+    return accepted
+
+
+def fail_job(job, worker_id, error, max_attempts=MAX_ATTEMPTS, db_path=QUEUE_DB_FILE):
+    """Release a job after an error, or mark it failed once it has used up its attempts."""
+    state = 'failed' if job['attempts'] + 1 >= max_attempts else 'pending'
+    conn = connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, lease_owner = NULL, lease_expires = NULL "
+            "WHERE id = ? AND lease_owner = ?",
+            (state, str(error), job['id'], worker_id)
+        )
+    finally:
+        conn.close()
+    logging.error(f"Job {job['id']} {job['window_start']}-{job['window_end']} failed ({state}): {error}")
+
+
+def run_worker(worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, poll_interval=5, exit_when_idle=True,
+               db_path=QUEUE_DB_FILE):
+    """
+    Lease, fetch and ack jobs until the queue is empty.
+
+    :param worker_id: Unique worker name (default host:pid).
+    :param lease_seconds: How long a job stays leased before other workers may reclaim it.
+    :param poll_interval: Seconds to wait when no job is available.
+    :param exit_when_idle: Return instead of polling once no job is available.
+    :param db_path: Path to the queue database.
+    :return: Number of jobs completed by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    while True:
+        job = lease_job(worker_id, lease_seconds, db_path)
+        if job is None:
+            if exit_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+        try:
+            query_params = json.loads(job['query_params']) if job['query_params'] else None
+            with log_context(run_id=job['run_id']):
+                # A failed page must fail the job, not ack a short or empty shard
+                listings = fetch_all_pages_for_date_range(
+                    job['window_start'], job['window_end'], query_params, raise_errors=True
+                )
+            if ack_job(job, worker_id, listings, db_path):
+                completed += 1
+                logging.info(f"Worker {worker_id} finished job {job['id']}: {len(listings)} listings")
+        except Exception as e:
+            fail_job(job, worker_id, e, db_path=db_path)
+    logging.info(f"Worker {worker_id} exiting after {completed} jobs")
+    return completed
+
+
+def run_status(run_id, db_path=QUEUE_DB_FILE):
+    """Count a run's jobs by state."""
+    conn = connect(db_path)
+    try:
+        rows = conn.execute("SELECT state, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY state", (run_id,)).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def requeue_failed(run_id, db_path=QUEUE_DB_FILE):
+    """
+    Put a run's failed jobs back in the queue with a fresh set of attempts.
+
+    :return: Number of jobs requeued.
+    """
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = 'pending', attempts = 0, error = NULL WHERE run_id = ? AND state = 'failed'",
+            (run_id,)
+        )
+        requeued = cursor.rowcount
+    finally:
+        conn.close()
+    logging.info(f"Requeued {requeued} failed jobs of run {run_id}")
+    return requeued
+
+
+def merge_run(run_id, skip_failed=False, db_path=QUEUE_DB_FILE):
+    """
+    Combine a finished run's job results into the scrape cache and listing store.
+
+    :param run_id: Run ID returned by enqueue_date_windows.
+    :param skip_failed: Merge even if some jobs failed for good, leaving their windows out.
+                        Otherwise a failed job blocks the merge until requeue_failed is run.
+    :param db_path: Path to the queue database.
+    :return: List of unique listings, or None if the run still has unfinished jobs.
+    """
+    status = run_status(run_id, db_path)
+    blocking = {'pending', 'leased'} if skip_failed else {'pending', 'leased', 'failed'}
+    unfinished = sum(count for state, count in status.items() if state in blocking)
+    if unfinished:
+        hint = " (requeue_failed or skip_failed to proceed)" if status.get('failed') else ""
+        logging.info(f"Run {run_id} not ready to merge: {status}{hint}")
+        return None
+    if status.get('failed'):
+        logging.warning(f"Merging run {run_id} without its {status['failed']} failed windows")
+
+    conn = connect(db_path)
+    try:
+        paths = [row[0] for row in conn.execute(
+            "SELECT result_path FROM jobs WHERE run_id = ? AND state = 'done' ORDER BY id", (run_id,)
+        )]
+    finally:
+        conn.close()
+
+    listings_by_id = {}
+    for path in paths:
+        with open(path, 'r') as f:
+            for listing in json.load(f):
+                listings_by_id[listing.get('listingID')] = listing
+    all_results = list(listings_by_id.values())
+
+    if all_results:
+        save_to_cache(run_id, all_results)
+        persist_listings(all_results, run_id=run_id)
+    logging.info(f"Merged run {run_id}: {len(all_results)} unique listings from {len(paths)} jobs")
+    return all_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shard scrapes across worker processes through a local job queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Queue the date windows of a scrape")
+    enqueue_parser.add_argument("--start", required=True, help="Oldest date, YYYY-MM-DD")
+    enqueue_parser.add_argument("--end", required=True, help="Most recent date, YYYY-MM-DD")
+    enqueue_parser.add_argument("--days", type=int, default=1, help="Window size in days")
+
+    work_parser = subparsers.add_parser("work", help="Run a worker until the queue is empty")
+    work_parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+    work_parser.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge a finished run into the cache")
+    merge_parser.add_argument("run_id")
+    merge_parser.add_argument("--skip-failed", action="store_true", help="Merge without windows that failed for good")
+
+    requeue_parser = subparsers.add_parser("requeue", help="Retry a run's failed jobs")
+    requeue_parser.add_argument("run_id")
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        run_id = enqueue_date_windows(
+            start_date=datetime.strptime(args.end, '%Y-%m-%d'),
+            end_date=datetime.strptime(args.start, '%Y-%m-%d'),
+            delta=timedelta(days=args.days)
+        )
+        print(run_id)
+    elif args.command == "work":
+        run_worker(lease_seconds=args.lease_seconds, exit_when_idle=not args.forever)
+    elif args.command == "merge":
+        if merge_run(args.run_id, skip_failed=args.skip_failed) is None:
+            print(f"Run {args.run_id} is not finished: {run_status(args.run_id)}")
+    elif args.command == "requeue":
+        print(requeue_failed(args.run_id))
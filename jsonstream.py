@@ -0,0 +1,215 @@
+import re
+import json
+import time
+import codecs
+
+# Bytes pulled off the response per read
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Consumed text is dropped from the buffer once this much has piled up
+_COMPACT_AT = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(r'-?[0-9][0-9.eE+-]*|-|true|false|null')
+_SKIP_TOKEN = re.compile(r'[^"{}\[\]]*(?:([{}\[\]])|"[^"\\]*(?:\\.[^"\\]*)*")')
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """
+    Text buffer over a stream of byte chunks, refilled on demand.
+
+    Time spent waiting for the next chunk is kept apart, so decode time can
+    be reported without the download folded in.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # Start of a value being scanned; compaction keeps everything from here
+        self.mark = None
+        self.bytes_read = 0
+        self.wait_seconds = 0.0
+
+    def fill(self):
+        """Append the next chunk; raises ValueError if the stream ended mid-document."""
+        if self.eof:
+            raise ValueError("Truncated JSON document")
+        keep = self.pos if self.mark is None else self.mark
+        if keep > _COMPACT_AT or (keep and keep * 2 > len(self.buf)):
+            self.buf = self.buf[keep:]
+            self.pos -= keep
+            if self.mark is not None:
+                self.mark = 0
+        started = time.perf_counter()
+        chunk = next(self.chunks, None)
+        self.wait_seconds += time.perf_counter() - started
+        if chunk is None:
+            self.eof = True
+            self.buf += self.utf8.decode(b"", final=True)
+            return
+        self.bytes_read += len(chunk)
+        self.buf += self.utf8.decode(chunk)
+
+    def peek(self):
+        """Next non-whitespace character, without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, found '{self.buf[self.pos]}'")
+        self.pos += 1
+
+    def _match(self, pattern):
+        """Match a token at pos that must not run into the end of the buffer before eof."""
+        while True:
+            match = pattern.match(self.buf, self.pos)
+            if match and (match.end() < len(self.buf) or self.eof):
+                self.pos = match.end()
+                return match.group()
+            self.fill()
+
+    def read_string(self):
+        if self.peek() != '"':
+            raise ValueError(f"Expected a string at offset {self.pos}, found '{self.buf[self.pos]}'")
+        return json.loads(self._match(_STRING))
+
+    def read_value(self):
+        """Decode one complete value into Python objects."""
+        if self.peek() in '{[':
+            # Retry only once the buffered text has doubled, so a value split across
+            # many chunks is decoded a bounded number of times rather than once per chunk
+            self.mark = self.pos
+            try:
+                while True:
+                    try:
+                        value, end = _decoder.raw_decode(self.buf, self.mark)
+                    except json.JSONDecodeError:
+                        if self.eof:
+                            raise
+                        target = 2 * (len(self.buf) - self.mark)
+                        while not self.eof and len(self.buf) - self.mark < target:
+                            self.fill()
+                        continue
+                    self.pos = end
+                    return value
+            finally:
+                self.mark = None
+        char = self.peek()
+        if char == '"':
+            return json.loads(self._match(_STRING))
+        if char not in '-0123456789tfn':
+            raise ValueError(f"Unexpected '{char}' at offset {self.pos}")
+        # Numbers and literals are matched whole first, since one split across chunks would still parse
+        return json.loads(self._match(_SCALAR))
+
+    def skip_value(self):
+        """Step over one value without building it."""
+        char = self.peek()
+        if char == '"':
+            self._match(_STRING)
+            return
+        if char not in '{[':
+            self.read_value()
+            return
+        depth = 0
+        while True:
+            # One regex step per string or bracket; a string cut off by the buffer end doesn't match
+            match = _SKIP_TOKEN.match(self.buf, self.pos)
+            if match is None:
+                self.fill()
+                continue
+            self.pos = match.end()
+            bracket = match.group(1)
+            if bracket is None:
+                continue
+            depth += 1 if bracket in '{[' else -1
+            if depth == 0:
+                return
+
+    def read_object(self, fields):
+        """Decode an object, keeping only the given keys and skipping the rest unbuilt."""
+        self.expect('{')
+        result = {}
+        if self.peek() == '}':
+            self.pos += 1
+            return result
+        while True:
+            key = self.read_string()
+            self.expect(':')
+            if key in fields:
+                result[key] = self.read_value()
+            else:
+                self.skip_value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return result
+
+
+def iter_array(chunks, path, fields=None, stats=None):
+    """
+    Yield the items of an array nested inside a JSON document as they arrive.
+
+    Everything outside the array is stepped over without being decoded, and
+    each item is yielded as soon as its closing brace is read, so the caller
+    can work on the first items while the rest is still downloading. Reading
+    stops at the end of the array.
+
+    :param chunks: Iterable of byte chunks, e.g. response.iter_content().
+    :param path: Object keys leading to the array, e.g. ('searchResults', 'data').
+    :param fields: Optional set of item keys to keep; other keys are skipped unbuilt.
+    :param stats: Optional dictionary that receives 'bytes' read and 'wait_seconds' spent waiting for data.
+    :return: Generator of decoded items; yields nothing if the path isn't in the document.
+    """
+    reader = _Reader(chunks)
+    try:
+        for key in path:
+            reader.expect('{')
+            while True:
+                if reader.peek() == '}':
+                    return
+                if reader.read_string() == key:
+                    reader.expect(':')
+                    break
+                reader.expect(':')
+                reader.skip_value()
+                if reader.peek() == ',':
+                    reader.pos += 1
+            if reader.peek() != '{' and key != path[-1]:
+                return
+
+        if reader.peek() != '[':
+            return
+        reader.pos += 1
+        if reader.peek() == ']':
+            return
+        while True:
+            if fields is not None and reader.peek() == '{':
+                yield reader.read_object(fields)
+            else:
+                yield reader.read_value()
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect(']')
+            return
+    finally:
+        if stats is not None:
+            stats['bytes'] = reader.bytes_read
+            stats['wait_seconds'] = reader.wait_seconds
+
+
+def iter_response_items(response, path, fields=None, stats=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream the items of a nested array out of a requests response opened with stream=True."""
+    return iter_array(response.iter_content(chunk_size=chunk_size), path, fields, stats)
@@ -0,0 +1,133 @@
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from datetime import datetime
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = "scraping.log"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Longest message or payload kept in a log record; the rest is cut off
+MAX_MESSAGE_CHARS = 2000
+MAX_PAYLOAD_CHARS = 500
+
+# Run and date window of the code currently logging; copied onto every record
+_run_id = contextvars.ContextVar("run_id", default=None)
+_window = contextvars.ContextVar("window", default=None)
+
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def truncate(text, limit=MAX_PAYLOAD_CHARS):
+    """Cut text to a limit, noting how much was dropped."""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+@contextmanager
+def log_context(run_id=None, window=None):
+    """
+    Tag records logged inside the block with a run ID and/or date window.
+
+    Context doesn't follow work into thread pools on its own; submit through
+    bind_log_context to carry it over.
+    """
+    tokens = []
+    if run_id is not None:
+        tokens.append((_run_id, _run_id.set(run_id)))
+    if window is not None:
+        tokens.append((_window, _window.set(window)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def bind_log_context(fn):
+    """Wrap fn so it runs with the caller's log context, e.g. on a pool thread."""
+    context = contextvars.copy_context()
+    # A context can only be entered by one thread at a time, so each call runs in its own copy
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. Runs in the logging thread, so it
+    only stamps the context and resolves the message; formatting and I/O
+    happen on the listener.
+    """
+
+    def prepare(self, record):
+        # Other handlers may still see the original record
+        record = copy.copy(record)
+        record.run_id = _run_id.get()
+        record.window = _window.get()
+        record.message = truncate(record.getMessage(), MAX_MESSAGE_CHARS)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the timestamp, level, thread, run and window."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'run_id', None):
+            entry['run_id'] = record.run_id
+        if getattr(record, 'window', None):
+            entry['window'] = record.window
+        if record.exc_text:
+            entry['exception'] = truncate(record.exc_text, MAX_MESSAGE_CHARS)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(log_file=LOG_FILE, level=logging.INFO, max_bytes=DEFAULT_MAX_BYTES,
+                      backup_count=DEFAULT_BACKUP_COUNT):
+    """
+    Route all logging through a queue to a dedicated writer thread.
+
+    The writer appends JSON lines to a size-rotated log file and plain text
+    to stderr. Safe to call more than once; only the first call configures.
+
+    :param log_file: Path of the JSON log file.
+    :param level: Root log level.
+    :param max_bytes: Size at which the log file is rotated.
+    :param backup_count: Number of rotated files kept.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+        file_handler.setFormatter(JsonFormatter())
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+        log_queue = queue.SimpleQueue()
+        _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(ContextQueueHandler(log_queue))
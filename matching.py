@@ -0,0 +1,242 @@
+import re
+import logging
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+# Canonical forms for street suffixes and directions, applied per token so
+# that names such as "Streetsville" are left untouched.
+STREET_ABBREVIATIONS = {
+    'avenue': 'ave', 'av': 'ave',
+    'street': 'st', 'str': 'st',
+    'road': 'rd',
+    'drive': 'dr', 'drv': 'dr',
+    'boulevard': 'blvd', 'blv': 'blvd',
+    'court': 'ct', 'crt': 'ct',
+    'crescent': 'cres', 'cresent': 'cres', 'cr': 'cres', 'crcs': 'cres',
+    'trail': 'trl', 'tr': 'trl',
+    'place': 'pl',
+    'lane': 'ln',
+    'circle': 'cir', 'crcl': 'cir',
+    'terrace': 'terr', 'ter': 'terr',
+    'parkway': 'pkwy',
+    'highway': 'hwy',
+    'square': 'sq',
+    'gate': 'gt',
+    'heights': 'hts',
+    'gardens': 'gdns',
+    'grove': 'grv',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w',
+}
+
+UNIT_WORDS = {'unit', 'apt', 'suite', 'ste', 'ph', 'th'}
+
+DEFAULT_MATCH_THRESHOLD = 0.85
+
+_ADDRESS_COLUMN_PATTERN = re.compile(r'^Address (\d+) - Street$')
+
+
+def normalize_address(address):
+    """Normalize address for comparison by removing common variations."""
+    if pd.isna(address):
+        return ""
+    address = str(address).lower()
+    # Remove common terms and extra spaces
+    replacements = [
+        ('avenue', 'ave'),
+        ('street', 'st'),
+        ('road', 'rd'),
+        ('drive', 'dr'),
+        ('boulevard', 'blvd'),
+        ('court', 'ct'),
+        (',', ''),
+        ('.', ''),
+        ('  ', ' ')
+    ]
+    for old, new in replacements:
+        address = address.replace(old, new)
+    return address.strip()
+
+
+def parse_address(address):
+    """
+    Split an address into its street number and canonical street name.
+
+    Unit designators ("Unit 5", "#5", "807-400 Web Dr") are dropped so that
+    a condo unit matches its building address.
+
+    :param address: Raw street address.
+    :return: Tuple of (street_number, street_name); empty strings if unparseable.
+    """
+    if pd.isna(address):
+        return "", ""
+    text = re.sub(r'[^a-z0-9#\- ]', ' ', str(address).lower())
+    tokens = text.split()
+
+    # Drop "unit 5" / "apt 5" pairs and "#5" tokens
+    cleaned = []
+    skip_next = False
+    for token in tokens:
+        if skip_next:
+            skip_next = False
+            continue
+        if token in UNIT_WORDS:
+            skip_next = True
+            continue
+        if token.startswith('#'):
+            continue
+        cleaned.append(token)
+
+    if not cleaned:
+        return "", ""
+
+    number = cleaned[0]
+    # "807-400" is unit 807 of building 400
+    if '-' in number:
+        number = number.rsplit('-', 1)[-1]
+    if not number[:1].isdigit():
+        return "", " ".join(STREET_ABBREVIATIONS.get(t, t) for t in cleaned)
+
+    street = [STREET_ABBREVIATIONS.get(t, t) for t in cleaned[1:] if t != '-']
+    return number, " ".join(street)
+
+
+def postal_fsa(postal_code):
+    """Return the forward sortation area (first three characters) of a postal code."""
+    if pd.isna(postal_code):
+        return ""
+    code = re.sub(r'\s+', '', str(postal_code)).upper()
+    return code[:3] if len(code) >= 3 else ""
+
+
+def detect_address_columns(client_df, address_column=None):
+    """
+    Find every street address column in a client CSV.
+
+    :param client_df: Client DataFrame.
+    :param address_column: Column selected by the user; always included first.
+    :return: List of street address column names.
+    """
+    columns = [address_column] if address_column in client_df.columns else []
+    for col in client_df.columns:
+        if _ADDRESS_COLUMN_PATTERN.match(str(col)) and col not in columns:
+            columns.append(col)
+    return columns
+
+
+def _postal_column_for(address_column, client_df):
+    """Map 'Address N - Street' to its 'Address N - Zip' column, if present."""
+    match = _ADDRESS_COLUMN_PATTERN.match(str(address_column))
+    if not match:
+        return None
+    zip_column = f"Address {match.group(1)} - Zip"
+    return zip_column if zip_column in client_df.columns else None
+
+
+def _blocking_frame(addresses, postal_codes):
+    """Build the parsed columns used for blocking and scoring."""
+    parsed = [parse_address(a) for a in addresses]
+    frame = pd.DataFrame(parsed, columns=['number', 'street'])
+    frame['fsa'] = [postal_fsa(p) for p in postal_codes]
+    frame['token'] = frame['street'].str.split(' ', n=1).str[0].fillna("")
+    return frame
+
+
+def build_client_address_index(client_df, address_columns):
+    """
+    Flatten every client address column into one parsed, blockable table.
+
+    :param client_df: Client DataFrame.
+    :param address_columns: Street address columns to index.
+    :return: DataFrame with one row per (client row, address column).
+    """
+    frames = []
+    for col in address_columns:
+        postal_column = _postal_column_for(col, client_df)
+        postal_codes = client_df[postal_column] if postal_column else [None] * len(client_df)
+        frame = _blocking_frame(client_df[col].tolist(), list(postal_codes))
+        frame['_crow'] = range(len(client_df))
+        frame['matched_address_column'] = col
+        frames.append(frame[frame['number'] != ""])
+    if not frames:
+        return pd.DataFrame(columns=['number', 'street', 'fsa', 'token', '_crow', 'matched_address_column'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _candidate_pairs(listing_index, client_index):
+    """Join listings to clients on the blocking keys and return unique candidate pairs."""
+    blocks = []
+    for keys in (['number', 'fsa'], ['number', 'token']):
+        left = listing_index[listing_index[keys[1]] != ""]
+        right = client_index[client_index[keys[1]] != ""]
+        blocks.append(left.merge(right, on=keys, suffixes=('_listing', '_client')))
+    pairs = pd.concat(blocks, ignore_index=True)
+    return pairs.drop_duplicates(subset=['_lrow', '_crow', 'matched_address_column'])
+
+
+def score_street_names(left, right):
+    """Similarity of two canonical street names in [0, 1]."""
+    if left == right:
+        return 1.0
+    return SequenceMatcher(None, left, right).ratio()
+
+
+def find_fuzzy_matching_listings(terminated_df, client_df, address_columns, threshold=DEFAULT_MATCH_THRESHOLD,
+                                 client_index=None):
+    """
+    Find terminated listings that approximately match any client address.
+
+    Candidates are first blocked on street number plus postal FSA or the first
+    street-name token, then scored within each block, so the cost grows with
+    the number of plausible pairs rather than listings x clients.
+
+    :param terminated_df: Scraped listings DataFrame.
+    :param client_df: Client DataFrame.
+    :param address_columns: Client street address columns to consider.
+    :param threshold: Minimum street-name similarity for a match.
+    :param client_index: Prebuilt build_client_address_index result for client_df, to skip re-parsing.
+    :return: DataFrame of matched listing/client rows with a 'match_score' column.
+    """
+    terminated = terminated_df.reset_index(drop=True)
+    clients = client_df.reset_index(drop=True)
+
+    postal_codes = terminated['postalCode'] if 'postalCode' in terminated.columns else [None] * len(terminated)
+    listing_index = _blocking_frame(terminated['streetAddress'].tolist(), list(postal_codes))
+    listing_index['_lrow'] = range(len(terminated))
+    listing_index = listing_index[listing_index['number'] != ""]
+
+    if client_index is None:
+        client_index = build_client_address_index(clients, address_columns)
+    pairs = _candidate_pairs(listing_index, client_index)
+
+    pairs = pairs.astype({'_lrow': 'int64', '_crow': 'int64'})
+    pairs['match_score'] = [
+        score_street_names(a, b)
+        for a, b in zip(pairs['street_listing'], pairs['street_client'])
+    ]
+    pairs = pairs[pairs['match_score'] >= threshold]
+    pairs = pairs.sort_values('match_score', ascending=False).drop_duplicates(subset=['_lrow', '_crow'])
+    logging.info(f"Fuzzy matching: {len(pairs)} matches above threshold {threshold}")
+
+    matches = pairs[['_lrow', '_crow', 'match_score', 'matched_address_column']]
+    matches = matches.merge(terminated, left_on='_lrow', right_index=True)
+    matches = matches.merge(clients, left_on='_crow', right_index=True, suffixes=('_terminated', '_client'))
+    return matches.drop(columns=['_lrow', '_crow']).reset_index(drop=True)
+
+
+def find_matching_terminated_listings(terminated_df, client_df, address_column):
+    """Find terminated listings that match client addresses."""
+    # Normalize addresses in both dataframes
+    terminated_df['normalized_address'] = terminated_df['streetAddress'].apply(normalize_address)
+    client_df['normalized_address'] = client_df[address_column].apply(normalize_address)
+
+    # Find matches
+    matches = pd.merge(
+        terminated_df,
+        client_df,
+        on='normalized_address',
+        how='inner',
+        suffixes=('_terminated', '_client')
+    )
+
+    return matches
@@ -0,0 +1,170 @@
+import os
+import sys
+import logging
+import threading
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Memory ceiling in MB; above it the app stops holding scrapes in session state
+DEFAULT_MEMORY_CEILING_MB = float(os.environ.get("WEBSCRAPER_MEMORY_CEILING_MB", 0)) or None
+
+_checkpoints = []
+_checkpoints_lock = threading.Lock()
+MAX_CHECKPOINTS = 200
+
+
+def _proc_status_kb(field):
+    """Read a field such as VmRSS from /proc/self/status, in KB, or None."""
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if unavailable."""
+    kb = _proc_status_kb("VmRSS")
+    return kb * 1024 if kb is not None else None
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or None if unavailable."""
+    kb = _proc_status_kb("VmHWM")
+    if kb is not None:
+        return kb * 1024
+    if resource is not None:
+        # ru_maxrss is KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+def is_tracking():
+    """Whether tracemalloc is running in this process."""
+    return tracemalloc.is_tracing()
+
+
+def start_tracking(frames=10):
+    """Start tracemalloc so checkpoints include Python allocation totals and top sites."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracking():
+    """Stop tracemalloc and free its bookkeeping."""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def checkpoint(stage):
+    """
+    Record RSS, peak RSS and (when tracking) traced Python memory at a stage boundary.
+
+    :param stage: Name of the pipeline stage just completed.
+    :return: The checkpoint dictionary.
+    """
+    point = {
+        'stage': stage,
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'rss_mb': _mb(current_rss()),
+        'peak_rss_mb': _mb(peak_rss()),
+    }
+    if tracemalloc.is_tracing():
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        point['traced_mb'] = _mb(traced)
+        point['traced_peak_mb'] = _mb(traced_peak)
+    with _checkpoints_lock:
+        _checkpoints.append(point)
+        del _checkpoints[:-MAX_CHECKPOINTS]
+    logging.info(f"Memory at {stage}: RSS {point['rss_mb']} MB, peak {point['peak_rss_mb']} MB")
+    return point
+
+
+def get_checkpoints():
+    """All checkpoints recorded so far, oldest first."""
+    with _checkpoints_lock:
+        return list(_checkpoints)
+
+
+def top_allocations(limit=10):
+    """
+    Largest allocation sites by traced size.
+
+    :return: List of dictionaries with 'site', 'size_mb' and 'count'; empty if not tracking.
+    """
+    if not tracemalloc.is_tracing():
+        return []
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    return [
+        {'site': str(stat.traceback[0]), 'size_mb': _mb(stat.size), 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def object_size(obj, _seen=None):
+    """
+    Approximate deep size of an object in bytes.
+
+    DataFrames use memory_usage(deep=True); lists, tuples, sets and dicts are
+    walked recursively, counting shared objects once.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'columns'):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'index'):
+        return int(obj.memory_usage(deep=True))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(object_size(k, _seen) + object_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(object_size(item, _seen) for item in obj)
+    return size
+
+
+def session_state_sizes(state):
+    """
+    Size of every entry in a session state mapping, largest first.
+
+    :param state: st.session_state or any mapping.
+    :return: List of dictionaries with 'key', 'type' and 'size_mb'.
+    """
+    sizes = [
+        {'key': str(key), 'type': type(value).__name__, 'size_mb': _mb(object_size(value))}
+        for key, value in state.items()
+    ]
+    return sorted(sizes, key=lambda row: row['size_mb'] or 0, reverse=True)
+
+
+def over_ceiling(ceiling_mb=DEFAULT_MEMORY_CEILING_MB):
+    """True if the process RSS exceeds the ceiling; always False without a ceiling."""
+    if not ceiling_mb:
+        return False
+    rss = current_rss()
+    return rss is not None and rss / (1024 * 1024) > ceiling_mb
+
+
+def _mb(num_bytes):
+    return round(num_bytes / (1024 * 1024), 2) if num_bytes is not None else None
+
+
+# Opt-in for the whole process, e.g. a dashboard being investigated
+if os.environ.get("WEBSCRAPER_TRACK_ALLOCATIONS"):
+    start_tracking()
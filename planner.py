@@ -0,0 +1,197 @@
+import time
+import logging
+import threading
+from datetime import timedelta
+from dataclasses import dataclass, replace
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from scraper import base_params, build_forward_date_ranges, create_session, fetch_results, persist_listings
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """
+    A declarative search: which area, districts, status, class and sale type to scrape.
+
+    Empty districts means the whole area. Specs that differ only in their
+    districts are merged into a single request.
+    """
+    area: str = 'Peel'
+    districts: tuple = ('Brampton', 'Mississauga')
+    status: str = 'TER'
+    listing_class: str = 'FREE'
+    sale_or_rent: str = 'SALE'
+
+    def merge_key(self):
+        """Everything except districts; specs with equal keys can share requests."""
+        return (self.area, self.status, self.listing_class, self.sale_or_rent)
+
+
+DEFAULT_QUERY_SPECS = [QuerySpec()]
+
+# Tries per page before its window is given up as failed
+MAX_PAGE_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Spaces out requests from all worker threads to a shared requests-per-second budget."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self.next_allowed = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may issue its next request."""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.next_allowed - now)
+            self.next_allowed = max(now, self.next_allowed) + self.interval
+        if delay:
+            time.sleep(delay)
+
+
+def merge_query_specs(specs):
+    """
+    Combine specs that differ only in districts into one spec per merge key.
+
+    :param specs: Iterable of QuerySpec.
+    :return: List of merged QuerySpec with sorted, de-duplicated districts.
+    """
+    merged = {}
+    for spec in specs:
+        key = spec.merge_key()
+        if key in merged:
+            # A spec without districts covers the whole area, so the merge must stay unrestricted
+            if merged[key].districts and spec.districts:
+                districts = tuple(sorted(set(merged[key].districts) | set(spec.districts)))
+            else:
+                districts = ()
+            merged[key] = replace(merged[key], districts=districts)
+        else:
+            merged[key] = replace(spec, districts=tuple(sorted(set(spec.districts))))
+    return list(merged.values())
+
+
+def build_query_params(spec):
+    """Translate a QuerySpec into search parameters based on base_params."""
+    params = {key: value for key, value in base_params.items() if not key.startswith('district[')}
+    params['area'] = spec.area
+    params['status'] = spec.status
+    params['class'] = spec.listing_class
+    params['saleOrRent'] = spec.sale_or_rent
+    for i, district in enumerate(spec.districts):
+        params[f'district[{i}]'] = district
+    return params
+
+
+_thread_state = threading.local()
+
+
+def _thread_session():
+    """One requests session per worker thread, reused across tasks."""
+    if not hasattr(_thread_state, 'session'):
+        _thread_state.session = create_session()
+    return _thread_state.session
+
+
+def _fetch_page(params, date_range, skip, take, limiter):
+    """Fetch one page of one query window under the shared rate budget."""
+    limiter.wait()
+    return fetch_results(skip=skip,
+                         take=take,
+                         last_update_start=date_range[0],
+                         last_update_end=date_range[1],
+                         session=_thread_session(),
+                         query_params=params,
+                         raise_errors=True)
+
+
+def run_query_plan(specs,
+                   since,
+                   until,
+                   delta=timedelta(days=1),
+                   max_workers=3,
+                   requests_per_second=5,
+                   take=200,
+                   progress_callback=None):
+    """
+    Scrape several query specs over a date span through one shared pool and rate budget.
+
+    Every (query, date window, page) is a task on the same executor. A page
+    that comes back full schedules the next page of its window. A page that
+    fails is retried up to MAX_PAGE_ATTEMPTS times; after that its window is
+    reported as failed rather than counted as complete. Listings returned by
+    more than one query are kept once.
+
+    :param specs: Iterable of QuerySpec.
+    :param since: Oldest date to cover.
+    :param until: Most recent date to cover.
+    :param delta: Span of each date window.
+    :param max_workers: Size of the shared worker pool.
+    :param requests_per_second: Shared request budget across all queries.
+    :param take: Page size.
+    :param progress_callback: Optional callback for progress updates.
+    :return: List of unique listings.
+    """
+    merged_specs = merge_query_specs(specs)
+    date_ranges = build_forward_date_ranges(since, until, delta)
+    limiter = RateLimiter(requests_per_second)
+    logging.info(f"Query plan: {len(merged_specs)} merged queries x {len(date_ranges)} windows")
+
+    listings_by_id = {}
+    pages_done = 0
+    windows_total = len(merged_specs) * len(date_ranges)
+    windows_done = 0
+    failed_windows = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        for spec in merged_specs:
+            params = build_query_params(spec)
+            for date_range in date_ranges:
+                future = executor.submit(_fetch_page, params, date_range, 0, take, limiter)
+                pending[future] = (params, date_range, 0, 1)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                params, date_range, skip, attempt = pending.pop(future)
+                pages_done += 1
+                try:
+                    batch = future.result()
+                except Exception as e:
+                    if attempt < MAX_PAGE_ATTEMPTS:
+                        logging.warning(f"Retrying {date_range} skip={skip} (attempt {attempt}): {e}")
+                        retry = executor.submit(_fetch_page, params, date_range, skip, take, limiter)
+                        pending[retry] = (params, date_range, skip, attempt + 1)
+                        continue
+                    logging.error(f"Giving up on {date_range} from skip={skip} after {attempt} attempts: {e}")
+                    failed_windows.append((params.get('area'), date_range, skip))
+                    batch = None
+
+                for listing in batch or []:
+                    listings_by_id[listing.get('listingID')] = listing
+
+                if batch is not None and len(batch) == take:
+                    next_future = executor.submit(_fetch_page, params, date_range, skip + take, take, limiter)
+                    pending[next_future] = (params, date_range, skip + take, 1)
+                else:
+                    windows_done += 1
+                    if progress_callback:
+                        failed = f", {len(failed_windows)} failed" if failed_windows else ""
+                        progress_callback(
+                            windows_done / windows_total,
+                            f"Query plan: {windows_done}/{windows_total} windows{failed}, {len(listings_by_id)} listings"
+                        )
+
+    logging.info(f"Query plan fetched {pages_done} pages, {len(listings_by_id)} unique listings")
+    if failed_windows:
+        logging.error(
+            f"Query plan incomplete: {len(failed_windows)} windows failed and are missing listings: "
+            + ", ".join(f"{area} {date_range[0]}-{date_range[1]} from skip={skip}"
+                        for area, date_range, skip in failed_windows)
+        )
+    if listings_by_id:
+        persist_listings(listings_by_id.values(), run_id="query_plan")
+    return list(listings_by_id.values())
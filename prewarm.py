@@ -0,0 +1,187 @@
+import os
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from scraper import get_cache_key, paginate_results
+
+PREWARM_DB_FILE = os.path.join("cache", "prewarm.db")
+
+# The sidebar defaults to the last 7 days
+DEFAULT_RANGE_DAYS = 7
+DEFAULT_REFRESH_INTERVAL = timedelta(minutes=30)
+DEFAULT_TOP_RANGES = 5
+
+
+def connect(db_path=PREWARM_DB_FILE):
+    """Open the pre-warm bookkeeping database, creating its table if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS ranges ("
+        "cache_key TEXT PRIMARY KEY, "
+        "start_date TEXT NOT NULL, "
+        "end_date TEXT NOT NULL, "
+        "requests INTEGER NOT NULL DEFAULT 0, "
+        "last_requested TEXT, "
+        "last_refreshed TEXT)"
+    )
+    return conn
+
+
+def default_range(today=None):
+    """Return the sidebar's default (start_date, end_date) as datetimes at midnight."""
+    today = datetime.combine((today or datetime.now()).date(), datetime.min.time())
+    return today - timedelta(days=DEFAULT_RANGE_DAYS), today
+
+
+def _range_key(start_date, end_date):
+    """Cache key paginate_results uses for a (start, end) range chosen in the UI."""
+    return get_cache_key(end_date.strftime('%Y%m%d'), start_date.strftime('%Y%m%d'))
+
+
+def record_range_request(start_date, end_date, db_path=PREWARM_DB_FILE):
+    """Count a UI request for a date range so popular ranges get pre-warmed."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO ranges (cache_key, start_date, end_date, requests, last_requested) "
+                "VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET requests = requests + 1, last_requested = excluded.last_requested",
+                (_range_key(start_date, end_date), start_date.isoformat(), end_date.isoformat(),
+                 datetime.now().isoformat())
+            )
+    finally:
+        conn.close()
+
+
+def get_last_refreshed(start_date, end_date, db_path=PREWARM_DB_FILE):
+    """Return when the pre-warmer last refreshed a range, or None."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT last_refreshed FROM ranges WHERE cache_key = ?", (_range_key(start_date, end_date),)
+        ).fetchone()
+    finally:
+        conn.close()
+    return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+
+def list_ranges(db_path=PREWARM_DB_FILE):
+    """All tracked ranges with request counts and refresh times, most requested first."""
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute("SELECT * FROM ranges ORDER BY requests DESC").fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def ranges_to_refresh(top_n=DEFAULT_TOP_RANGES, db_path=PREWARM_DB_FILE):
+    """
+    The default range plus the most requested ranges ending within the default window.
+
+    Ranges that ended long ago no longer change, so only recent ones are kept warm.
+
+    :return: List of (start_date, end_date) datetimes.
+    """
+    default_start, default_end = default_range()
+    ranges = [(default_start, default_end)]
+    cutoff = (default_end - timedelta(days=DEFAULT_RANGE_DAYS)).isoformat()
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT start_date, end_date FROM ranges WHERE end_date >= ? ORDER BY requests DESC LIMIT ?",
+            (cutoff, top_n)
+        ).fetchall()
+    finally:
+        conn.close()
+    for start, end in rows:
+        candidate = (datetime.fromisoformat(start), datetime.fromisoformat(end))
+        if candidate not in ranges:
+            ranges.append(candidate)
+    return ranges
+
+
+def refresh_range(start_date, end_date, db_path=PREWARM_DB_FILE):
+    """Re-scrape a range, overwrite its cache and record the refresh time."""
+    listings = paginate_results(start_date=end_date, end_date=start_date, force_refresh=True)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO ranges (cache_key, start_date, end_date, last_refreshed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(cache_key) DO UPDATE SET last_refreshed = excluded.last_refreshed",
+                (_range_key(start_date, end_date), start_date.isoformat(), end_date.isoformat(),
+                 datetime.now().isoformat())
+            )
+    finally:
+        conn.close()
+    logging.info(f"Pre-warmed {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}: {len(listings)} listings")
+    return listings
+
+
+def run_prewarm_cycle(interval=DEFAULT_REFRESH_INTERVAL, top_n=DEFAULT_TOP_RANGES, db_path=PREWARM_DB_FILE):
+    """Refresh every tracked range whose last refresh is older than the interval."""
+    refreshed = 0
+    for start_date, end_date in ranges_to_refresh(top_n, db_path):
+        last = get_last_refreshed(start_date, end_date, db_path)
+        if last is not None and datetime.now() - last < interval:
+            continue
+        try:
+            refresh_range(start_date, end_date, db_path)
+            refreshed += 1
+        except Exception as e:
+            logging.error(f"Error pre-warming {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}: {e}")
+    return refreshed
+
+
+def run_prewarm_scheduler(interval=DEFAULT_REFRESH_INTERVAL, top_n=DEFAULT_TOP_RANGES, stop_event=None,
+                          db_path=PREWARM_DB_FILE):
+    """
+    Keep the cache warm until stop_event is set.
+
+    :param interval: How often each range is refreshed.
+    :param top_n: Number of most-requested ranges to keep warm besides the default.
+    :param stop_event: Optional threading.Event that ends the loop.
+    :param db_path: Path to the pre-warm bookkeeping database.
+    """
+    stop_event = stop_event or threading.Event()
+    logging.info(f"Cache pre-warmer started: every {interval}, top {top_n} ranges")
+    while not stop_event.is_set():
+        started = time.monotonic()
+        run_prewarm_cycle(interval, top_n, db_path)
+        # Wake up often enough to honor the interval for every range
+        stop_event.wait(max(60.0, interval.total_seconds() / 4 - (time.monotonic() - started)))
+
+
+def start_background_prewarmer(interval=DEFAULT_REFRESH_INTERVAL, top_n=DEFAULT_TOP_RANGES):
+    """Run the pre-warm scheduler on a daemon thread; returns the Event that stops it."""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_prewarm_scheduler,
+        kwargs={'interval': interval, 'top_n': top_n, 'stop_event': stop_event},
+        name="cache-prewarmer",
+        daemon=True
+    )
+    thread.start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the scrape cache warm for the default and most requested ranges.")
+    parser.add_argument("--interval-minutes", type=float, default=DEFAULT_REFRESH_INTERVAL.total_seconds() / 60)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_RANGES, help="Most requested ranges to keep warm")
+    parser.add_argument("--once", action="store_true", help="Run a single refresh cycle and exit")
+    args = parser.parse_args()
+
+    interval = timedelta(minutes=args.interval_minutes)
+    if args.once:
+        run_prewarm_cycle(interval, args.top)
+    else:
+        run_prewarm_scheduler(interval, args.top)
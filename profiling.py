@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+import logging
+import argparse
+import threading
+import contextvars
+from datetime import datetime
+from collections import defaultdict
+from contextlib import contextmanager
+
+PROFILE_DIR = "profiles"
+
+# Profiling is off unless a run is started or WEBSCRAPER_PROFILE is set.
+# Runs started with start_run belong to the caller's context (a session's script
+# thread, plus the pool threads it hands work to via bind_log_context), so
+# concurrent sessions each profile their own run. The WEBSCRAPER_PROFILE run
+# covers the whole process and is written out at exit.
+_active_run = contextvars.ContextVar('profile_run', default=None)
+_process_run = None
+_run_lock = threading.Lock()
+_span_stack = threading.local()
+
+
+class ProfileRun:
+    """Timing spans, and optionally cProfile and stack samples, collected for one pipeline run."""
+
+    def __init__(self, name, use_cprofile=False, sample_interval=None):
+        self.name = name
+        self.run_id = f"{datetime.now():%Y%m%d_%H%M%S}_{name}"
+        self.started = time.perf_counter()
+        self.spans = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0})
+        self.stacks = defaultdict(float)
+        self.samples = defaultdict(int)
+        self.lock = threading.Lock()
+        self.profiler = cProfile.Profile() if use_cprofile else None
+        self.sample_interval = sample_interval
+        self.sampler = None
+        self.stop_sampling = threading.Event()
+
+    def record(self, path, duration, self_time):
+        """
+        Add one finished span; path is the tuple of enclosing span names and
+        self_time excludes nested spans, as collapsed stacks expect.
+        """
+        with self.lock:
+            stats = self.spans[path[-1]]
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            self.stacks[";".join(path)] += self_time
+
+    def _sample(self):
+        """Periodically capture the Python stack of every thread in collapsed form."""
+        own_ident = threading.get_ident()
+        while not self.stop_sampling.wait(self.sample_interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                with self.lock:
+                    self.samples[";".join(reversed(names))] += 1
+
+    def start(self):
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                # Only one profiler may be active at a time on newer Pythons
+                logging.warning(f"cProfile unavailable for run {self.run_id}: {e}")
+                self.profiler = None
+        if self.sample_interval:
+            self.sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self.sampler.start()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.sampler is not None:
+            self.stop_sampling.set()
+            self.sampler.join()
+
+    def report(self):
+        """Summary of the run: per-stage timings sorted by total time."""
+        elapsed = time.perf_counter() - self.started
+        stages = [
+            {'stage': name, 'count': s['count'], 'total_s': round(s['total'], 4),
+             'mean_ms': round(1000 * s['total'] / s['count'], 2), 'max_ms': round(1000 * s['max'], 2),
+             'share': round(s['total'] / elapsed, 4) if elapsed else 0.0}
+            for name, s in self.spans.items()
+        ]
+        stages.sort(key=lambda row: row['total_s'], reverse=True)
+        return {'run_id': self.run_id, 'name': self.name, 'elapsed_s': round(elapsed, 4), 'stages': stages}
+
+
+def current_run():
+    """The run spans are recorded into here: the caller's own run, else the process-wide one."""
+    return _active_run.get() or _process_run
+
+
+def profiling_enabled():
+    """True while a profiling run is active for the caller."""
+    return current_run() is not None
+
+
+@contextmanager
+def span(name):
+    """
+    Time a pipeline stage. Nested spans form a stack per thread, so the
+    collapsed output reads like a flamegraph of stages. A no-op when
+    profiling is off.
+    """
+    run = current_run()
+    if run is None:
+        yield
+        return
+    stack = getattr(_span_stack, 'frames', None)
+    if stack is None:
+        stack = _span_stack.frames = []
+    # Each frame is [name, time spent in nested spans]
+    stack.append([name, 0.0])
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        path = tuple(frame[0] for frame in stack)
+        run.record(path, duration, duration - stack[-1][1])
+        stack.pop()
+        if stack:
+            stack[-1][1] += duration
+
+
+def start_run(name="run", use_cprofile=False, sample_interval=None, process_wide=False):
+    """
+    Begin collecting spans for a run.
+
+    :param name: Label used in the report directory name.
+    :param use_cprofile: Also run cProfile on the calling thread.
+    :param sample_interval: Seconds between stack samples of all threads; None disables sampling.
+    :param process_wide: Collect spans from every thread without a run of its own,
+                         and write the report when the process exits.
+    :return: The active ProfileRun.
+    """
+    global _process_run
+    if process_wide:
+        with _run_lock:
+            if _process_run is None:
+                _process_run = ProfileRun(name, use_cprofile, sample_interval)
+                _process_run.start()
+                atexit.register(finish_process_run)
+            return _process_run
+    run = _active_run.get()
+    if run is None:
+        run = ProfileRun(name, use_cprofile, sample_interval)
+        run.start()
+        _active_run.set(run)
+    return run
+
+
+def finish_process_run(output_dir=PROFILE_DIR):
+    """Stop the process-wide run and write its report; None if there was none."""
+    global _process_run
+    with _run_lock:
+        run, _process_run = _process_run, None
+    if run is None:
+        return None
+    return _write_report(run, output_dir)
+
+
+def finish_run(output_dir=PROFILE_DIR):
+    """
+    Stop the caller's run and write its report.
+
+    Writes report.json, report.txt, stages.folded (span stacks in
+    microseconds) and, when enabled, samples.folded and cprofile.prof. The
+    .folded files are in the collapsed-stack format read by flamegraph.pl
+    and speedscope.
+
+    :return: Report dictionary including 'path', or None if no run was active.
+    """
+    run = _active_run.get()
+    if run is None:
+        return None
+    _active_run.set(None)
+    return _write_report(run, output_dir)
+
+
+def _write_report(run, output_dir):
+    run.stop()
+
+    run_dir = os.path.join(output_dir, run.run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    report = run.report()
+    report['path'] = run_dir
+
+    with open(os.path.join(run_dir, "report.json"), 'w') as f:
+        json.dump(report, f, indent=2)
+    with open(os.path.join(run_dir, "report.txt"), 'w') as f:
+        f.write(format_report(report))
+    with open(os.path.join(run_dir, "stages.folded"), 'w') as f:
+        for stack, seconds in sorted(run.stacks.items()):
+            # Self time in microseconds
+            f.write(f"{stack} {int(seconds * 1_000_000)}\n")
+    if run.samples:
+        with open(os.path.join(run_dir, "samples.folded"), 'w') as f:
+            for stack, count in sorted(run.samples.items()):
+                f.write(f"{stack} {count}\n")
+    if run.profiler is not None:
+        run.profiler.dump_stats(os.path.join(run_dir, "cprofile.prof"))
+
+    logging.info(f"Profile report written to {run_dir}")
+    return report
+
+
+def format_report(report):
+    """Render a report as a fixed-width text table."""
+    lines = [
+        f"Run {report['run_id']}: {report['elapsed_s']:.3f}s",
+        f"{'stage':<24}{'count':>8}{'total s':>12}{'mean ms':>12}{'max ms':>12}{'share':>8}",
+    ]
+    for row in report['stages']:
+        lines.append(
+            f"{row['stage']:<24}{row['count']:>8}{row['total_s']:>12.3f}{row['mean_ms']:>12.2f}"
+            f"{row['max_ms']:>12.2f}{row['share']:>8.1%}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def load_report(run_dir):
+    """Load a report written by finish_run."""
+    with open(os.path.join(run_dir, "report.json"), 'r') as f:
+        return json.load(f)
+
+
+def latest_run_dir(output_dir=PROFILE_DIR):
+    """Directory of the most recent report, or None."""
+    if not os.path.isdir(output_dir):
+        return None
+    runs = sorted(os.listdir(output_dir))
+    return os.path.join(output_dir, runs[-1]) if runs else None
+
+
+if os.environ.get("WEBSCRAPER_PROFILE"):
+    start_run("env", sample_interval=float(os.environ.get("WEBSCRAPER_PROFILE_SAMPLE", 0)) or None,
+              process_wide=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show a pipeline profiling report.")
+    parser.add_argument("run_dir", nargs="?", help="Report directory (default: most recent)")
+    parser.add_argument("--cprofile", action="store_true", help="Also print the top cProfile entries")
+    args = parser.parse_args()
+
+    run_dir = args.run_dir or latest_run_dir()
+    if run_dir is None:
+        print("No profiling reports found.")
+        sys.exit(1)
+    print(format_report(load_report(run_dir)), end="")
+    prof_path = os.path.join(run_dir, "cprofile.prof")
+    if args.cprofile and os.path.exists(prof_path):
+        pstats.Stats(prof_path).sort_stats("cumulative").print_stats(25)
@@ -1,19 +1,41 @@
 import os
+import hashlib
 import requests
 import json
 from datetime import datetime, timedelta
 import time
+import tempfile
 import logging
+import threading
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from analytics import update_listings as update_analytics
+from history import record_observation
+from jsonstream import iter_response_items
+from logconfig import bind_log_context, configure_logging, log_context, truncate
+from profiling import span
+from transport import (
+    DEFAULT_TRANSPORT,
+    HTTP1_ACCEPT_ENCODING,
+    create_http2_session,
+    http2_available,
+    log_connection_stats,
+    record_transfer,
+    release_response,
+    track_http1_response,
+    wire_bytes as transfer_wire_bytes,
+)
+from store import clear_run, get_watermark, iter_listings, set_watermark, upsert_listings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[logging.FileHandler("scraping.log"),
-              logging.StreamHandler()])
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Configure logging: JSON lines to a rotating scraping.log, written off the fetch threads
+configure_logging()
 
 # Create cache directory if it doesn't exist
 CACHE_DIR = "cache"
@@ -31,17 +53,139 @@ def get_cache_file_path(cache_key):
     return os.path.join(CACHE_DIR, f"{cache_key}.json")
 
 
+def atomic_write_json(path, data, indent=None):
+    """
+    Write JSON to a temporary file in the target directory and rename it into place,
+    so readers see either the old file or the complete new one, never a partial write.
+
+    Any iterable other than a list or dict is written as a JSON array one item at
+    a time, so a generator's items never all have to be in memory.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if isinstance(data, (list, dict)):
+                json.dump(data, f, indent=indent)
+            else:
+                f.write("[")
+                for i, item in enumerate(data):
+                    f.write(", " if i else "")
+                    json.dump(item, f)
+                f.write("]")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def cache_file_lock(cache_key, on_wait=None):
+    """
+    Hold an exclusive lock on a cache key across processes.
+
+    Uses an flock'd lock file next to the cache; on platforms without fcntl
+    only the in-process single-flight applies.
+
+    :param on_wait: Optional callable run once if another process holds the lock, before waiting for it.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = os.path.join(CACHE_DIR, f"{cache_key}.lock")
+    with open(lock_path, 'a') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if on_wait is not None:
+                on_wait()
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# In-flight scrapes keyed by cache key, shared by all threads of this process
+_inflight = {}
+_inflight_lock = threading.Lock()
+# Latest (fraction, message) of each in-flight scrape, for callers waiting on it
+_inflight_progress = {}
+
+
+def run_single_flight(key, fn, on_wait=None):
+    """
+    Run fn once per key at a time; concurrent callers with the same key wait
+    for the running call and share its result (or exception).
+
+    :param on_wait: Optional callable run every PROGRESS_INTERVAL seconds while
+                    waiting on another caller, e.g. to show get_scrape_progress(key).
+    """
+    with _inflight_lock:
+        entry = _inflight.get(key)
+        leader = entry is None
+        if leader:
+            entry = {'event': threading.Event(), 'result': None, 'error': None}
+            _inflight[key] = entry
+
+    if not leader:
+        logging.info(f"Waiting for in-flight scrape of {key}")
+        while not entry['event'].wait(PROGRESS_INTERVAL):
+            if on_wait is not None:
+                try:
+                    on_wait()
+                except Exception as e:
+                    logging.error(f"Error in single-flight wait callback: {e}")
+        if entry['error'] is not None:
+            raise entry['error']
+        return entry['result']
+
+    try:
+        entry['result'] = fn()
+        return entry['result']
+    except BaseException as e:
+        entry['error'] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+            _inflight_progress.pop(key, None)
+        entry['event'].set()
+
+
+def publish_scrape_progress(key, fraction, message):
+    """Record an in-flight scrape's progress for the callers waiting on it."""
+    with _inflight_lock:
+        _inflight_progress[key] = (fraction, message)
+
+
+def get_scrape_progress(key):
+    """Latest (fraction, message) of an in-flight scrape of a cache key, or None."""
+    with _inflight_lock:
+        return _inflight_progress.get(key)
+
+
 def save_to_cache(cache_key, data):
     """Save data to cache."""
     cache_file = get_cache_file_path(cache_key)
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(data, f)
+        atomic_write_json(cache_file, data)
         logging.info(f"Data saved to cache: {cache_file}")
     except Exception as e:
         logging.error(f"Error saving to cache: {e}")
 
 
+def get_cache_timestamp(cache_key):
+    """Return when the cache for a key was written, or None if it doesn't exist."""
+    cache_file = get_cache_file_path(cache_key)
+    if os.path.exists(cache_file):
+        return datetime.fromtimestamp(os.path.getmtime(cache_file))
+    return None
+
+
 def load_from_cache(cache_key):
     """Load data from cache if available."""
     cache_file = get_cache_file_path(cache_key)
@@ -56,6 +200,74 @@ def load_from_cache(cache_key):
     return None
 
 
+# Per-listing verification cache shared by all sessions
+VERIFICATION_CACHE_FILE = os.path.join(CACHE_DIR, "verification_cache.json")
+DEFAULT_VERIFICATION_TTL = timedelta(hours=6)
+_verification_cache_lock = threading.Lock()
+
+
+def load_verification_cache():
+    """Load the per-listing verification cache, or an empty one if unavailable."""
+    if os.path.exists(VERIFICATION_CACHE_FILE):
+        try:
+            with open(VERIFICATION_CACHE_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading verification cache: {e}")
+    return {}
+
+
+def get_cached_verifications(listing_ids, ttl=DEFAULT_VERIFICATION_TTL):
+    """
+    Split listing IDs into those verified within the TTL and those that are stale.
+
+    :param listing_ids: List of listing IDs to look up.
+    :param ttl: Maximum age of a cached verification.
+    :return: Tuple of (dict of fresh listingID -> status info, list of stale IDs).
+    """
+    with _verification_cache_lock:
+        cache = load_verification_cache()
+    cutoff = datetime.now() - ttl
+    fresh = {}
+    stale = []
+    for listing_id in listing_ids:
+        entry = cache.get(str(listing_id))
+        if entry and datetime.fromisoformat(entry['verified_at']) >= cutoff:
+            fresh[listing_id] = dict(entry['status'], verified_at=entry['verified_at'])
+        else:
+            stale.append(listing_id)
+    return fresh, stale
+
+
+def save_verifications(results):
+    """
+    Record successful verifications in the shared cache.
+
+    The on-disk cache is re-read before writing so entries added by other
+    sessions since our last load are kept.
+
+    :param results: Dictionary mapping listing IDs to status info with 'verified_at'.
+    """
+    entries = {
+        str(listing_id): {
+            'verified_at': status_info['verified_at'],
+            'status': {k: v for k, v in status_info.items() if k != 'verified_at'}
+        }
+        for listing_id, status_info in results.items()
+        if status_info.get('verified')
+    }
+    if not entries:
+        return
+    with _verification_cache_lock:
+        cache = load_verification_cache()
+        cache.update(entries)
+        try:
+            atomic_write_json(VERIFICATION_CACHE_FILE, cache)
+            logging.info(f"Saved {len(entries)} verifications to cache")
+        except Exception as e:
+            logging.error(f"Error saving verification cache: {e}")
+
+
 # Define base parameters
 base_params = {
     'availability':
@@ -108,12 +320,163 @@ base_params = {
     '200'
 }
 
+# Same area and class as base_params but without the status/availability
+# filters, so listings that left TER since the scrape are returned too.
+changed_since_params = {
+    key: value
+    for key, value in base_params.items()
+    if key not in ('status', 'availability', 'unavailableDate')
+}
+
+# Named field projections: what each call path asks the API to return
+PROJECTION_PROFILES = {
+    'full': {
+        '$select': base_params['$select'],
+        '$imageSizes[0]': base_params['$imageSizes[0]'],
+        '$imageSizes[1]': base_params['$imageSizes[1]'],
+        '$project': base_params['$project'],
+    },
+    'verify': {
+        '$select': [
+            'status', 'displayStatus', 'modified', 'listingID',
+            'streetAddress', 'city', 'price', 'daysOnMarket'
+        ],
+    },
+    'match': {
+        '$select': [
+            'listingID', 'status', 'streetAddress', 'postalCode', 'modified',
+            'city', 'price'
+        ],
+    },
+}
+
+_PROJECTION_KEYS = ('$select', '$imageSizes[0]', '$imageSizes[1]', '$project')
+
+# Listing keys kept when decoding each profile's responses; the API adds formatted
+# copies of several fields even to narrow selects, and those are skipped undecoded.
+# The full profile keeps everything, since exports carry every column.
+PROFILE_FIELDS = {
+    profile: frozenset(projection['$select']) | {'listingID'}
+    for profile, projection in PROJECTION_PROFILES.items()
+    if profile != 'full'
+}
+
+# Where the listings sit in a search response
+RESULTS_PATH = ('searchResults', 'data')
+
+# Listings requested per page
+PAGE_SIZE = 200
+
+# Minimum seconds between progress events while a scrape runs
+PROGRESS_INTERVAL = 0.5
+
+# Per-profile transfer statistics, accumulated across all threads
+_projection_stats = {}
+_projection_stats_lock = threading.Lock()
 
-def create_session():
+
+def apply_projection(params, profile='full'):
+    """Return a copy of params with the profile's $select, image sizes and projection."""
+    if profile not in PROJECTION_PROFILES:
+        raise ValueError(f"Unknown projection profile: {profile}")
+    projected = {key: value for key, value in params.items() if key not in _PROJECTION_KEYS}
+    projected.update(PROJECTION_PROFILES[profile])
+    return projected
+
+
+def record_projection_stats(profile, response, parse_seconds, listing_count, body_bytes=None):
+    """
+    Accumulate bytes on the wire and JSON parse time for a profile.
+
+    A streamed body is already consumed by now, so its size comes from the
+    raw stream, or the decoded byte count for chunked responses.
+    """
+    wire_bytes = transfer_wire_bytes(response) or body_bytes or 0
+    with _projection_stats_lock:
+        stats = _projection_stats.setdefault(
+            profile, {'requests': 0, 'bytes': 0, 'parse_seconds': 0.0, 'listings': 0}
+        )
+        stats['requests'] += 1
+        stats['bytes'] += wire_bytes
+        stats['parse_seconds'] += parse_seconds
+        stats['listings'] += listing_count
+
+
+def get_projection_stats():
+    """Snapshot of per-profile requests, bytes, parse seconds and listings."""
+    with _projection_stats_lock:
+        return {profile: dict(stats) for profile, stats in _projection_stats.items()}
+
+
+def log_projection_stats():
+    """Log a one-line transfer summary per profile."""
+    for profile, stats in get_projection_stats().items():
+        logging.info(
+            f"Profile '{profile}': {stats['requests']} requests, {stats['bytes'] / 1024:.1f} KiB on the wire, "
+            f"{stats['parse_seconds']:.3f}s parsing, {stats['listings']} listings"
+        )
+
+
+# Search endpoint; point it at a local stand-in (see transport_bench.py) to measure offline
+SEARCH_URL = os.environ.get("WEBSCRAPER_SEARCH_URL", "https://app.realmmlp.ca/search")
+
+# Required headers
+SESSION_HEADERS = {
+    'accept': 'application/json',
+    'accept-language': 'en-US,en;q=0.9',
+    'baggage':
+    'sentry-environment=production,sentry-public_key=e9f1abedeae34f04a098c5c0ebb1737a,sentry-trace_id=4d885e178ee6450ab482343ccdd4e648,sentry-sample_rate=0.1,sentry-sampled=false',
+    'referer': 'https://app.realmmlp.ca/s',
+    'sec-ch-ua':
+    '"Google Chrome";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
+    'sec-ch-ua-mobile': '?1',
+    'sec-ch-ua-platform': '"Android"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'same-origin',
+    'sentry-trace': '4d885e178ee6450ab482343ccdd4e648-ac8d50b4649cdddd-0',
+    'user-agent':
+    'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Mobile Safari/537.36',
+    'x-auth-userid': '537fa6ee5e5599a855d2f81b',
+    'x-requested-with': 'XMLHttpRequest'
+}
+
+# Required cookies
+SESSION_COOKIES = {
+    '_ga':
+    'GA1.3.6299276.1729021923',
+    '_ga_1':
+    'GA1.1.6299276.1729021923',
+    '_gid':
+    'GA1.3.1792005162.1729112353',
+    '_gat':
+    '1',
+    '_gat_1':
+    '1',
+    's':
+    'eyJwYXNzcG9ydCI6eyJ1c2VyIjoiNTM3ZmE2ZWU1ZTU1OTlhODU1ZDJmODFiIn0sInMiOiJhYWQ5YmY5Zi03YmEzLTQxZGUtYTFjZS1jNGZkMWFjM2IyZWEiLCJub3ciOjI4ODE5OTQzLCJpIjo4MH0=',
+    's.sig':
+    'ASpJMzN-iA35W9KNclYWvG1ZwBs',
+    '_ga_G0XQP73LHV':
+    'GS1.1.1729193701.4.1.1729196603.21.1.1860857804'
+}
+
+
+def create_session(transport=None):
     """
     Create a new session with retry strategy.
     This function is called by each thread to have its own session.
+
+    :param transport: 'http1' (a requests session) or 'http2' (a session over the
+                      shared multiplexed client); defaults to WEBSCRAPER_TRANSPORT.
     """
+    transport = transport or DEFAULT_TRANSPORT
+    if transport == 'http2':
+        if http2_available():
+            return create_http2_session(SESSION_HEADERS, SESSION_COOKIES,
+                                        prior_knowledge=SEARCH_URL.startswith('http://'))
+        logging.warning("HTTP/2 transport needs httpx and h2; falling back to HTTP/1.1")
+
     session = requests.Session()
     retry = Retry(
         total=5,
@@ -125,51 +488,41 @@ def create_session():
     session.mount('https://', adapter)
     session.mount('http://', adapter)
 
-    # Add required headers
-    session.headers.update({
-        'accept': 'application/json',
-        'accept-language': 'en-US,en;q=0.9',
-        'baggage':
-        'sentry-environment=production,sentry-public_key=e9f1abedeae34f04a098c5c0ebb1737a,sentry-trace_id=4d885e178ee6450ab482343ccdd4e648,sentry-sample_rate=0.1,sentry-sampled=false',
-        'referer': 'https://app.realmmlp.ca/s',
-        'sec-ch-ua':
-        '"Google Chrome";v="129", "Not=A?Brand";v="8", "Chromium";v="129"',
-        'sec-ch-ua-mobile': '?1',
-        'sec-ch-ua-platform': '"Android"',
-        'sec-fetch-dest': 'empty',
-        'sec-fetch-mode': 'cors',
-        'sec-fetch-site': 'same-origin',
-        'sentry-trace': '4d885e178ee6450ab482343ccdd4e648-ac8d50b4649cdddd-0',
-        'user-agent':
-        'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Mobile Safari/537.36',
-        'x-auth-userid': '537fa6ee5e5599a855d2f81b',
-        'x-requested-with': 'XMLHttpRequest'
-    })
-
-    # Add required cookies
-    session.cookies.update({
-        '_ga':
-        'GA1.3.6299276.1729021923',
-        '_ga_1':
-        'GA1.1.6299276.1729021923',
-        '_gid':
-        'GA1.3.1792005162.1729112353',
-        '_gat':
-        '1',
-        '_gat_1':
-        '1',
-        's':
-        'eyJwYXNzcG9ydCI6eyJ1c2VyIjoiNTM3ZmE2ZWU1ZTU1OTlhODU1ZDJmODFiIn0sInMiOiJhYWQ5YmY5Zi03YmEzLTQxZGUtYTFjZS1jNGZkMWFjM2IyZWEiLCJub3ciOjI4ODE5OTQzLCJpIjo4MH0=',
-        's.sig':
-        'ASpJMzN-iA35W9KNclYWvG1ZwBs',
-        '_ga_G0XQP73LHV':
-        'GS1.1.1729193701.4.1.1729196603.21.1.1860857804'
-    })
+    session.headers.update(SESSION_HEADERS)
+    session.headers['accept-encoding'] = HTTP1_ACCEPT_ENCODING
+    session.cookies.update(SESSION_COOKIES)
+    session.hooks['response'].append(track_http1_response)
 
     return session
 
 
-def fetch_results(skip, take, last_update_start, last_update_end, session):
+def read_listings(response, profile='full'):
+    """
+    Decode the listings of a streamed search response as the body downloads.
+
+    Listings are parsed one at a time off the stream instead of buffering the
+    whole page and decoding it at once, and keys the profile doesn't keep are
+    skipped without being built.
+
+    :param response: Response from a request made with stream=True.
+    :param profile: Projection profile the request used.
+    :return: List of listing dictionaries.
+    """
+    stream_stats = {}
+    started = time.perf_counter()
+    try:
+        with span("json_decode"):
+            listings = list(iter_response_items(response, RESULTS_PATH, PROFILE_FIELDS.get(profile), stream_stats))
+    finally:
+        record_transfer(response, stream_stats.get('bytes'))
+    # Time spent waiting on the network is download, not parsing
+    parse_seconds = time.perf_counter() - started - stream_stats.get('wait_seconds', 0.0)
+    record_projection_stats(profile, response, parse_seconds, len(listings), stream_stats.get('bytes'))
+    return listings
+
+
+def fetch_results(skip, take, last_update_start, last_update_end, session, query_params=None, profile='full',
+                  raise_errors=False):
     """
     Fetch a batch of listings from the API based on the provided date range.
 
@@ -177,71 +530,332 @@ def fetch_results(skip, take, last_update_start, last_update_end, session):
     :param take: Number of records to retrieve.
     :param last_update_start: Start date for filtering listings.
     :param last_update_end: End date for filtering listings.
-    :param session: The requests session to use for the HTTP request.
+    :param session: Session from create_session (requests or HTTP/2).
+    :param query_params: Search parameters to use instead of base_params.
+    :param profile: Projection profile controlling the returned fields (see PROJECTION_PROFILES).
+    :param raise_errors: Re-raise request and decoding errors after logging them, instead of
+                         returning an empty list that looks like the end of the results.
     :return: List of listings or an empty list if none are found.
     """
-    params = base_params.copy()
+    params = apply_projection(query_params or base_params, profile)
     params['$skip'] = str(skip)
     params['$take'] = str(take)
     params['lastUpdateDate[0]'] = f">={last_update_start}"
     params['lastUpdateDate[1]'] = f"<={last_update_end}"
 
     try:
-        response = session.get('https://app.realmmlp.ca/search',
-                               params=params,
-                               timeout=10)
+        with span("http"):
+            # Only the headers are awaited here; the body is decoded as it streams in
+            response = session.get(SEARCH_URL,
+                                   params=params,
+                                   timeout=10,
+                                   stream=True)
         response.raise_for_status()
-        data = response.json()
-        logging.debug(f"Response Data: {json.dumps(data, indent=4)}")
-
-        # Correctly access the 'data' list within 'searchResults'
-        listings = data.get('searchResults', {}).get('data', [])
+        with response:
+            listings = read_listings(response, profile)
+        # Only pay for pretty-printing the whole page when debug logging is on
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            with span("debug_dump"):
+                logging.debug(f"Response Data: {json.dumps(listings, indent=4)}")
         return listings
     except requests.exceptions.HTTPError as http_err:
-        logging.error(f"HTTP error occurred: {http_err}")
-        logging.error(f"Response content: {response.text}")
+        logging.error(f"HTTP error occurred: {http_err}; response: {truncate(response.text)}")
+        release_response(response)
+        if raise_errors:
+            raise
     except requests.exceptions.RequestException as req_err:
         logging.error(f"Request exception: {req_err}")
-    except ValueError:
-        logging.error("Error decoding JSON response.")
-        logging.error(f"Response content: {response.text}")
+        if raise_errors:
+            raise
+    except ValueError as e:
+        # The body was consumed while decoding, so only the decoder's position is left to report
+        logging.error(f"Error decoding JSON response: {e}")
+        if raise_errors:
+            raise
     return []
 
 
-def fetch_all_pages_for_date_range(formatted_date_start, formatted_date_end):
+def fetch_all_pages_for_date_range(formatted_date_start, formatted_date_end, query_params=None, profile='full',
+                                   raise_errors=False):
     """
     Fetch all pages of listings for a given date range.
 
     :param formatted_date_start: Start date in MM/DD/YYYY format.
     :param formatted_date_end: End date in MM/DD/YYYY format.
+    :param query_params: Search parameters to use instead of base_params.
+    :param profile: Projection profile controlling the returned fields.
+    :param raise_errors: Raise if any page fails, rather than returning the pages fetched so far.
     :return: List of listings for the date range.
     """
     listings = []
     skip = 0
-    take = 200
+    take = PAGE_SIZE
     more_data = True
     session = create_session()  # Each thread uses its own session
-    while more_data:
-        batch = fetch_results(skip=skip,
-                              take=take,
-                              last_update_start=formatted_date_start,
-                              last_update_end=formatted_date_end,
-                              session=session)
-        if batch:
-            listings.extend(batch)
-            skip += take
-            if len(batch) < take:
+    with log_context(window=f"{formatted_date_start}-{formatted_date_end}"):
+        while more_data:
+            batch = fetch_results(skip=skip,
+                                  take=take,
+                                  last_update_start=formatted_date_start,
+                                  last_update_end=formatted_date_end,
+                                  session=session,
+                                  query_params=query_params,
+                                  profile=profile,
+                                  raise_errors=raise_errors)
+            if batch:
+                listings.extend(batch)
+                skip += take
+                if len(batch) < take:
+                    more_data = False
+            else:
                 more_data = False
-        else:
-            more_data = False
     return listings
 
 
+def persist_listings(listings, run_id=None, track_run=False):
+    """
+    Write fetched listings to the listing store, then fold them into the change
+    history and running price analytics.
+
+    :param listings: Listing dictionaries from the API.
+    :param run_id: Scrape that produced them, recorded with their changes.
+    :param track_run: Also record them as the run's members, so the run can be browsed from the store.
+    """
+    listings = list(listings)
+    with span("store_upsert"):
+        upsert_listings(listings, run_id=run_id if track_run else None)
+    # History and analytics are derived from the store, so a failure there only costs a refresh
+    try:
+        with span("history"):
+            record_observation(listings, run_id=run_id)
+    except Exception as e:
+        logging.error(f"Error recording listing history: {e}")
+    try:
+        with span("analytics"):
+            update_analytics(listings)
+    except Exception as e:
+        logging.error(f"Error updating price analytics: {e}")
+
+
+def build_date_ranges(start_date, end_date, delta=timedelta(days=1)):
+    """
+    Split a span into date windows, walking back from the most recent date.
+
+    :param start_date: The most recent date to cover.
+    :param end_date: The oldest date to cover.
+    :param delta: Span of each window.
+    :return: List of (start, end) tuples in MM/DD/YYYY format, newest first.
+    """
+    date_ranges = []
+
+    current_end_date = start_date
+    current_start_date = start_date - delta
+    max_iterations = 1000  # Prevent infinite loops; adjust as needed
+    iteration = 0
+
+    while current_start_date >= end_date and iteration < max_iterations:
+        formatted_date_start = current_start_date.strftime('%m/%d/%Y')
+        formatted_date_end = current_end_date.strftime('%m/%d/%Y')
+        date_ranges.append((formatted_date_start, formatted_date_end))
+
+        current_end_date = current_start_date - timedelta(days=1)
+        current_start_date = current_end_date - delta
+        iteration += 1
+
+    return date_ranges
+
+
+def build_forward_date_ranges(since, until, delta=timedelta(days=1)):
+    """
+    Split [since, until] into consecutive inclusive date windows, oldest first.
+
+    :param since: First date to cover.
+    :param until: Last date to cover.
+    :param delta: Span of each window.
+    :return: List of (start, end) tuples in MM/DD/YYYY format.
+    """
+    date_ranges = []
+    window_start = since
+    while window_start.date() <= until.date():
+        window_end = min(window_start + delta, until)
+        date_ranges.append((window_start.strftime('%m/%d/%Y'), window_end.strftime('%m/%d/%Y')))
+        window_start = window_end + timedelta(days=1)
+    return date_ranges
+
+
+def parse_modified(value):
+    """Parse a listing's 'modified' value (ISO string or epoch milliseconds) to a naive datetime."""
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).isdigit():
+            return datetime.fromtimestamp(float(value) / 1000)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        return parsed.replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def get_query_key(query_params):
+    """Stable identifier for a set of search parameters, used for sync watermarks."""
+    canonical = json.dumps(query_params, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def sync_listings(query_params=None,
+                  initial_start=None,
+                  overlap=timedelta(days=1),
+                  delta=timedelta(days=1),
+                  progress_callback=None,
+                  watermark_key=None,
+                  profile='full'):
+    """
+    Incrementally sync listings into the listing store using a high-water mark.
+
+    Only date windows after the latest 'modified' value seen for this query
+    are fetched, starting `overlap` earlier to catch late writes. The first
+    sync for a query starts at `initial_start`. If a window fails, the
+    watermark only advances to listings modified before that window.
+
+    :param query_params: Search parameters to sync (default base_params).
+    :param initial_start: Start date when the query has never been synced (default 7 days ago).
+    :param overlap: How far before the watermark to re-fetch.
+    :param delta: Span of each date window.
+    :param progress_callback: Optional callback for progress updates.
+    :param watermark_key: Keep a separate watermark under this name, so another
+                          consumer of the same query doesn't advance ours.
+    :param profile: Projection profile; only full records are written to the listing store.
+    :return: List of listings fetched by this sync.
+    """
+    query_params = query_params or base_params
+    query_key = get_query_key(query_params)
+    if watermark_key is not None:
+        query_key = f"{watermark_key}_{query_key}"
+    watermark = parse_modified(get_watermark(query_key))
+
+    if watermark is not None:
+        since = watermark - overlap
+    else:
+        since = initial_start or datetime.now() - timedelta(days=7)
+    date_ranges = build_forward_date_ranges(since, datetime.now(), delta)
+    logging.info(f"Syncing query {query_key} from {since.strftime('%Y-%m-%d')}: {len(date_ranges)} windows")
+
+    all_results = []
+    failed_starts = []
+    with log_context(run_id=f"sync_{query_key}"), ThreadPoolExecutor(max_workers=3) as executor:
+        fetch = bind_log_context(fetch_all_pages_for_date_range)
+        futures = {
+            executor.submit(fetch, dr[0], dr[1], query_params, profile, raise_errors=True): dr
+            for dr in date_ranges
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                all_results.extend(future.result())
+            except Exception as e:
+                logging.error(f"Error syncing date range {futures[future]}: {e}")
+                failed_starts.append(datetime.strptime(futures[future][0], '%m/%d/%Y'))
+            if progress_callback:
+                progress_callback(done / len(date_ranges), f"Syncing: {done}/{len(date_ranges)} windows")
+
+    # A failed window must be fetched again next time, so the watermark may not pass its start
+    ceiling = min(failed_starts, default=None)
+    if ceiling is not None:
+        logging.warning(f"{len(failed_starts)} windows failed; holding the watermark before {ceiling.strftime('%Y-%m-%d')}")
+
+    if all_results:
+        if profile == 'full':
+            persist_listings(all_results, run_id=f"sync_{query_key}")
+        modified = [
+            (parse_modified(listing.get('modified')), listing.get('modified')) for listing in all_results
+        ]
+        latest = max(
+            ((parsed, value) for parsed, value in modified if parsed and (ceiling is None or parsed < ceiling)),
+            default=None
+        )
+        if latest is not None and (watermark is None or latest[0] > watermark):
+            set_watermark(query_key, str(latest[1]))
+
+    logging.info(f"Sync of query {query_key} fetched {len(all_results)} listings")
+    return all_results
+
+
+class ScrapeProgress:
+    """
+    Running totals of a windowed scrape, with rate and ETA estimates.
+
+    Updated from the thread collecting window results, so callbacks fed from
+    it run on that thread too.
+    """
+
+    def __init__(self, windows_total, interval=PROGRESS_INTERVAL):
+        self.windows_total = windows_total
+        self.windows_done = 0
+        self.listings = 0
+        self.requests = 0
+        self.interval = interval
+        self.started = time.monotonic()
+        self._last_emit = None
+
+    def window_done(self, listing_count):
+        self.windows_done += 1
+        self.listings += listing_count
+        # A window pages until a short page, so its request count follows from its size
+        self.requests += listing_count // PAGE_SIZE + 1
+
+    @property
+    def fraction(self):
+        return self.windows_done / self.windows_total if self.windows_total else 1.0
+
+    @property
+    def requests_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self):
+        """Seconds left at the pace so far, or None before the first window finishes."""
+        if not self.windows_done:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed / self.windows_done * (self.windows_total - self.windows_done)
+
+    def due(self):
+        """Whether enough time has passed to publish another event; the last window always is."""
+        now = time.monotonic()
+        if self.windows_done < self.windows_total and self._last_emit is not None \
+                and now - self._last_emit < self.interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def snapshot(self):
+        return {
+            'windows_done': self.windows_done,
+            'windows_total': self.windows_total,
+            'listings': self.listings,
+            'requests': self.requests,
+            'requests_per_second': round(self.requests_per_second, 2),
+            'eta_seconds': None if self.eta_seconds is None else round(self.eta_seconds, 1),
+        }
+
+    def message(self):
+        eta = self.eta_seconds
+        eta_text = "" if eta is None or self.windows_done == self.windows_total else f", about {eta:.0f}s left"
+        return (
+            f"Scraping: {self.windows_done}/{self.windows_total} windows, {self.listings} listings, "
+            f"{self.requests_per_second:.1f} req/s{eta_text}"
+        )
+
+
 def paginate_results(start_date,
                      end_date,
                      delta=timedelta(days=1),
                      progress_callback=None,
-                     use_cache=True):
+                     use_cache=True,
+                     force_refresh=False,
+                     profile='full',
+                     partial_results_callback=None,
+                     spill_check=None):
     """
     Retrieve all listings by paginating through the API based on specified date ranges.
     Now with caching support.
@@ -249,83 +863,208 @@ def paginate_results(start_date,
     :param start_date: The most recent date to start fetching listings.
     :param end_date: The oldest date to stop fetching listings.
     :param delta: The time delta to decrement each iteration (default is 4 days).
-    :param progress_callback: Optional callback for progress updates.
+    :param progress_callback: Optional callback for progress updates, at most every PROGRESS_INTERVAL seconds.
     :param use_cache: Whether to use cached data (default True).
-    :return: List of all fetched listings.
+    :param force_refresh: Skip reading the cache but still overwrite it with fresh results.
+    :param profile: Projection profile; lighter profiles are cached separately from 'full'.
+    :param partial_results_callback: Optional callback receiving the listings gathered so far
+                                     (read-only) and a ScrapeProgress snapshot, throttled like progress_callback.
+    :param spill_check: Optional callable polled as listings are collected (full profile only). Once it
+                        returns True, the listings go to the listing store under the cache key instead
+                        of being held in memory; browse them with store.query_listings(run_id=cache_key).
+    :return: List of all fetched listings, or None if they were spilled to the listing store.
     """
     # Generate cache key for the entire date range
     cache_key = get_cache_key(start_date.strftime('%Y%m%d'),
                               end_date.strftime('%Y%m%d'))
+    if profile != 'full':
+        cache_key = f"{cache_key}_{profile}"
 
     # Try to load from cache first if caching is enabled
-    if use_cache:
-        cached_data = load_from_cache(cache_key)
+    if use_cache and not force_refresh:
+        with span("cache_load"):
+            cached_data = load_from_cache(cache_key)
         if cached_data is not None:
             logging.info(
                 f"Using cached data for date range {start_date} to {end_date}")
+            if progress_callback:
+                progress_callback(1.0, f"Loaded {len(cached_data)} listings from cache")
+            if profile == 'full' and spill_check is not None and spill_check():
+                spill_listings(cache_key, cached_data)
+                return None
             return cached_data
 
-    all_results = []
-    date_ranges = []
+    # Coalesce concurrent requests for the same range, in this process and across processes.
+    # Callers that join another caller's scrape follow its progress but only see its final result.
+    requested_at = time.time()
 
-    current_end_date = start_date
-    current_start_date = start_date - delta
-    max_iterations = 1000  # Prevent infinite loops; adjust as needed
-    iteration = 0
+    def report_wait():
+        fraction, message = get_scrape_progress(cache_key) or (0.0, "starting")
+        progress_callback(fraction, f"Waiting for another scrape of this range: {message}")
 
-    while current_start_date >= end_date and iteration < max_iterations:
-        formatted_date_start = current_start_date.strftime('%m/%d/%Y')
-        formatted_date_end = current_end_date.strftime('%m/%d/%Y')
-        date_ranges.append((formatted_date_start, formatted_date_end))
+    return run_single_flight(
+        cache_key,
+        lambda: _scrape_date_range(cache_key, start_date, end_date, delta, use_cache, requested_at, profile,
+                                   progress_callback, partial_results_callback,
+                                   spill_check if profile == 'full' else None),
+        on_wait=report_wait if progress_callback else None
+    )
 
-        current_end_date = current_start_date - timedelta(days=1)
-        current_start_date = current_end_date - delta
-        iteration += 1
 
-    logging.info(f"Total date ranges to process: {len(date_ranges)}")
+def spill_listings(cache_key, listings):
+    """Record a scrape's listings in the listing store as its members, replacing any earlier membership."""
+    logging.info(f"Spilling {len(listings)} listings of {cache_key} to the listing store")
+    clear_run(cache_key)
+    persist_listings(listings, run_id=cache_key, track_run=True)
 
-    max_workers = 3  # Adjust based on your system's capability
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(fetch_all_pages_for_date_range, dr[0], dr[1]): dr
-            for dr in date_ranges
-        }
 
-        for future in as_completed(futures):
-            date_range = futures[future]
+def _scrape_date_range(cache_key, start_date, end_date, delta, use_cache, requested_at, profile='full',
+                       progress_callback=None, partial_results_callback=None, spill_check=None):
+    """
+    Fetch every window of a date range while holding the cache key's lock file.
+
+    If another process finished the same range while we waited for the lock,
+    its freshly written cache is returned instead of scraping again. Progress
+    and partial results are published from this thread as windows complete.
+    Once spill_check returns True, each window is written to the listing
+    store as it arrives and None is returned.
+    """
+    def report_lock_wait():
+        message = "Waiting for another process's scrape of this range"
+        publish_scrape_progress(cache_key, 0.0, message)
+        if progress_callback:
+            progress_callback(0.0, message)
+
+    with cache_file_lock(cache_key, on_wait=report_lock_wait), log_context(run_id=cache_key):
+        cache_timestamp = get_cache_timestamp(cache_key)
+        if cache_timestamp is not None and cache_timestamp.timestamp() >= requested_at:
+            cached_data = load_from_cache(cache_key)
+            if cached_data is not None:
+                logging.info(f"Using results of a concurrent scrape for {cache_key}")
+                if progress_callback:
+                    progress_callback(1.0, f"Loaded {len(cached_data)} listings from another process's scrape")
+                if spill_check is not None and spill_check():
+                    spill_listings(cache_key, cached_data)
+                    return None
+                return cached_data
+
+        all_results = []
+        spilled = False
+        date_ranges = build_date_ranges(start_date, end_date, delta)
+
+        logging.info(f"Total date ranges to process: {len(date_ranges)}")
+        progress = ScrapeProgress(len(date_ranges))
+
+        max_workers = 3  # Adjust based on your system's capability
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetch = bind_log_context(fetch_all_pages_for_date_range)
+            futures = {
+                executor.submit(fetch, dr[0], dr[1], None, profile): dr
+                for dr in date_ranges
+            }
+
+            for future in as_completed(futures):
+                date_range = futures[future]
+                listings = None
+                try:
+                    listings = future.result()
+                    if listings:
+                        all_results.extend(listings)
+                        logging.info(
+                            f"Fetched {len(listings)} listings for date range {date_range}. Total so far: {len(all_results)}"
+                        )
+                    else:
+                        logging.info(
+                            f"No listings found for date range {date_range}.")
+                    progress.window_done(len(listings or []))
+                except Exception as e:
+                    progress.window_done(0)
+                    logging.error(
+                        f"Error fetching data for date range {date_range}: {e}")
+
+                if not spilled and spill_check is not None and spill_check():
+                    spilled = True
+                    spill_listings(cache_key, all_results)
+                elif spilled and listings:
+                    persist_listings(listings, run_id=cache_key, track_run=True)
+                if spilled:
+                    # Nothing is held in memory from here on
+                    all_results = []
+
+                if progress.due():
+                    publish_scrape_progress(cache_key, progress.fraction, progress.message())
+                    try:
+                        if progress_callback:
+                            progress_callback(progress.fraction, progress.message())
+                        if partial_results_callback and not spilled:
+                            partial_results_callback(all_results, progress.snapshot())
+                    except Exception as e:
+                        # A broken display must not cost the scrape
+                        logging.error(f"Error in scrape progress callback: {e}")
+
+        logging.info(f"Total listings fetched: {progress.listings}")
+        log_projection_stats()
+        log_connection_stats()
+
+        if spilled:
+            # The cache is written back from the store so the next load doesn't scrape again
+            if use_cache:
+                with span("cache_save"):
+                    save_to_cache(cache_key, iter_listings(run_id=cache_key))
+            return None
+
+        # Keep the indexed listing store up to date (full records only)
+        if all_results and profile == 'full':
             try:
-                listings = future.result()
-                if listings:
-                    all_results.extend(listings)
-                    logging.info(
-                        f"Fetched {len(listings)} listings for date range {date_range}. Total so far: {len(all_results)}"
-                    )
-                else:
-                    logging.info(
-                        f"No listings found for date range {date_range}.")
+                persist_listings(all_results, run_id=cache_key)
             except Exception as e:
-                logging.error(
-                    f"Error fetching data for date range {date_range}: {e}")
+                logging.error(f"Error updating listing store: {e}")
 
-    logging.info(f"Total listings fetched: {len(all_results)}")
+        # Save results to cache if data was fetched
+        if all_results and use_cache:
+            with span("cache_save"):
+                save_to_cache(cache_key, all_results)
 
-    # Save results to cache if data was fetched
-    if all_results and use_cache:
-        save_to_cache(cache_key, all_results)
+        return all_results
 
-    return all_results
 
-
-def verify_listing_status(listing_ids, progress_callback=None):
+def verify_listing_status(listing_ids,
+                          progress_callback=None,
+                          use_cache=True,
+                          cache_ttl=DEFAULT_VERIFICATION_TTL,
+                          max_seconds=None,
+                          max_requests=None,
+                          partial_results_callback=None):
     """
     Verify the current status of previously scraped listings by checking against the API using today's date.
+
+    Listings are verified in the order given, so callers should pass the most
+    important IDs first. When a time or request budget runs out, the listings
+    not yet requested are left out of the results.
     
-    :param listing_ids: List of listing IDs to verify.
+    :param listing_ids: List of listing IDs to verify, highest priority first.
     :param progress_callback: Optional callback for progress updates.
+    :param use_cache: Whether to answer recently verified listings from the verification cache.
+    :param cache_ttl: Maximum age of a cached verification (default 6 hours).
+    :param max_seconds: Optional wall-clock budget for API requests.
+    :param max_requests: Optional cap on the number of API requests.
+    :param partial_results_callback: Optional callback receiving the results gathered so far after each batch.
     :return: Dictionary mapping listing IDs to their current status information.
     """
     if not listing_ids:
         return {}
+
+    results = {}
+    if use_cache:
+        results, listing_ids = get_cached_verifications(listing_ids, cache_ttl)
+        logging.info(f"{len(results)} listings answered from verification cache, {len(listing_ids)} stale")
+        if partial_results_callback and results:
+            partial_results_callback(dict(results))
+        if not listing_ids:
+            if progress_callback:
+                progress_callback(1.0, f"Verification complete: {len(results)} listings answered from cache")
+            return results
+    cached_count = len(results)
     
     # Create a session for API requests
     session = create_session()
@@ -335,43 +1074,159 @@ def verify_listing_status(listing_ids, progress_callback=None):
     logging.info(f"Starting verification of {len(listing_ids)} listings against current data as of {today.strftime('%Y-%m-%d')}")
     logging.info("Verification will check if previously terminated listings are still terminated today")
     
-    # Prepare results dictionary
-    results = {}
     total = len(listing_ids)
+    started = time.monotonic()
+    requests_sent = 0
+    fresh_results = {}
     
     # Process in batches to avoid overwhelming the API
     batch_size = 20
     batches = [listing_ids[i:i + batch_size] for i in range(0, len(listing_ids), batch_size)]
     
-    for batch_index, batch in enumerate(batches):
-        # Update progress if callback provided
-        if progress_callback:
-            progress = (batch_index * batch_size) / total
-            progress_callback(progress, f"Verifying listings: {batch_index * batch_size}/{total}")
-        
-        # Process each listing ID in the batch
-        with ThreadPoolExecutor(max_workers=5) as executor:
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        for batch_index, batch in enumerate(batches):
+            # Stop once the time or request budget is spent
+            if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                logging.info(f"Verification time budget of {max_seconds}s reached after {requests_sent} requests")
+                break
+            if max_requests is not None:
+                if requests_sent >= max_requests:
+                    logging.info(f"Verification request budget of {max_requests} reached")
+                    break
+                batch = batch[:max_requests - requests_sent]
+
+            # Update progress if callback provided
+            if progress_callback:
+                progress = requests_sent / total
+                progress_callback(progress, f"Verifying listings: {requests_sent}/{total}")
+            
+            # Process each listing ID in the batch
             futures = {executor.submit(fetch_listing_status, listing_id, session): listing_id for listing_id in batch}
+            requests_sent += len(batch)
             
             for future in as_completed(futures):
                 listing_id = futures[future]
                 try:
                     status_info = future.result()
-                    results[listing_id] = status_info
+                    status_info['verified_at'] = datetime.now().isoformat()
+                    fresh_results[listing_id] = status_info
                 except Exception as e:
                     logging.error(f"Error verifying listing {listing_id}: {e}")
-                    results[listing_id] = {"error": str(e), "verified": False}
-        
-        # Small delay to avoid rate limiting
-        time.sleep(0.5)
+                    fresh_results[listing_id] = {"error": str(e), "verified": False}
+            
+            results.update((listing_id, fresh_results[listing_id]) for listing_id in batch)
+            if partial_results_callback:
+                partial_results_callback(dict(results))
+            
+            # Small delay to avoid rate limiting
+            time.sleep(0.5)
     
+    if use_cache:
+        save_verifications(fresh_results)
+    log_projection_stats()
+
     # Final progress update
     if progress_callback:
-        progress_callback(1.0, f"Verification complete: {total}/{total} listings checked")
+        skipped = total - requests_sent
+        message = f"Verification complete: {requests_sent}/{total} listings checked, {cached_count} from cache"
+        if skipped:
+            message += f", {skipped} skipped (budget reached)"
+        progress_callback(1.0, message)
     
     return results
 
 
+def verify_listing_status_since(listing_ids, since, progress_callback=None, delta=timedelta(days=1)):
+    """
+    Verify listings in bulk by scanning everything in the area updated since the scrape.
+
+    Instead of one request per listing, the area's listings updated between
+    `since` and today are paged through without a status filter and joined
+    locally against the scraped IDs. Listings absent from the scan have not
+    changed since the scrape and keep their scraped status. If any window
+    fails, absence proves nothing, so listings not seen in the scan are
+    returned unverified with the error instead.
+
+    :param listing_ids: List of listing IDs to verify.
+    :param since: Datetime of the scrape; the scan starts on this date.
+    :param progress_callback: Optional callback for progress updates.
+    :param delta: Size of each date window scanned (default 1 day).
+    :return: Dictionary mapping listing IDs to their current status information.
+    """
+    if not listing_ids:
+        return {}
+
+    date_ranges = build_forward_date_ranges(since, datetime.now(), delta)
+
+    logging.info(f"Scanning {len(date_ranges)} date windows for changes since {since.strftime('%Y-%m-%d')}")
+
+    # Keep the most recently modified record per listing
+    changed = {}
+    failed_windows = []
+    run_id = f"verify_since_{since.strftime('%Y%m%d')}"
+    with log_context(run_id=run_id), ThreadPoolExecutor(max_workers=3) as executor:
+        fetch = bind_log_context(fetch_all_pages_for_date_range)
+        futures = {
+            executor.submit(fetch, dr[0], dr[1], changed_since_params, 'verify', raise_errors=True): dr
+            for dr in date_ranges
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                for listing in future.result():
+                    previous = changed.get(listing.get('listingID'))
+                    if previous is None or str(listing.get('modified')) > str(previous.get('modified')):
+                        changed[listing.get('listingID')] = listing
+            except Exception as e:
+                logging.error(f"Error scanning date range {futures[future]}: {e}")
+                failed_windows.append((futures[future], e))
+            if progress_callback:
+                progress_callback(done / len(date_ranges), f"Scanning changed listings: {done}/{len(date_ranges)} windows")
+
+    verified_at = datetime.now().isoformat()
+    results = {}
+    for listing_id in listing_ids:
+        listing = changed.get(listing_id)
+        if listing is None and failed_windows:
+            # Its change may be in a window that failed, so the scraped status can't be confirmed
+            date_range, error = failed_windows[0]
+            results[listing_id] = {
+                "error": f"{len(failed_windows)} scan windows failed, e.g. {date_range[0]}-{date_range[1]}: {error}",
+                "verified": False
+            }
+        elif listing is None:
+            # Not updated since the scrape, so the scraped status still holds
+            results[listing_id] = {
+                "found": True,
+                "verified": True,
+                "still_terminated": True,
+                "verified_at": verified_at
+            }
+        else:
+            results[listing_id] = {
+                "found": True,
+                "status": listing.get('status'),
+                "displayStatus": listing.get('displayStatus'),
+                "modified": listing.get('modified'),
+                "price": listing.get('price'),
+                "daysOnMarket": listing.get('daysOnMarket'),
+                "verified": True,
+                "still_terminated": listing.get('status') == 'TER',
+                "verified_at": verified_at
+            }
+
+    updated = sum(1 for listing_id in listing_ids if listing_id in changed)
+    logging.info(f"Changed-since scan: {updated} of {len(listing_ids)} listings updated since the scrape")
+    if failed_windows:
+        unverified = len(listing_ids) - updated
+        logging.warning(f"Changed-since scan: {len(failed_windows)} windows failed, {unverified} listings left unverified")
+        if progress_callback:
+            progress_callback(1.0, f"Verification incomplete: {len(failed_windows)} scan windows failed, "
+                                   f"{unverified} listings could not be verified")
+    elif progress_callback:
+        progress_callback(1.0, f"Verification complete: {updated} of {len(listing_ids)} listings changed since the scrape")
+    return results
+
+
 def fetch_listing_status(listing_id, session):
     """
     Fetch the current status of a single listing from the API using today's date.
@@ -388,25 +1243,22 @@ def fetch_listing_status(listing_id, session):
         yesterday_formatted = yesterday.strftime('%m/%d/%Y')
         
         # Modify base parameters to search for a specific listing ID with today's date range
-        params = {
+        params = apply_projection({
             'listingID': listing_id,
             '$gid': 'treb',
             'gid': 'TREB',
             '$output': 'list',
             'lastUpdateDate[0]': f">={yesterday_formatted}",  # Use yesterday to today for current status
             'lastUpdateDate[1]': f"<={today_formatted}",
-            '$select': [
-                'status', 'displayStatus', 'modified', 'listingID',
-                'streetAddress', 'city', 'price', 'daysOnMarket'
-            ]
-        }
-        
-        response = session.get('https://app.realmmlp.ca/search', params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        }, 'verify')
         
-        # Extract listing data
-        listings = data.get('searchResults', {}).get('data', [])
+        with span("http"):
+            response = session.get(SEARCH_URL, params=params, timeout=10, stream=True)
+        try:
+            response.raise_for_status()
+            listings = read_listings(response, 'verify')
+        finally:
+            release_response(response)
         
         if listings:
             # Listing found - return its current status
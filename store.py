@@ -0,0 +1,245 @@
+import os
+import json
+import sqlite3
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+# Embedded listing store, kept next to the JSON caches
+LISTING_DB_FILE = os.path.join("cache", "listings.db")
+
+# Columns promoted out of the JSON record so they can be indexed and filtered
+STORE_COLUMNS = {
+    'status': 'TEXT',
+    'displayStatus': 'TEXT',
+    'typeName': 'TEXT',
+    'city': 'TEXT',
+    'postalCode': 'TEXT',
+    'streetAddress': 'TEXT',
+    'modified': 'TEXT',
+    'price': 'REAL',
+    'originalListPrice': 'REAL',
+    'daysOnMarket': 'INTEGER',
+    'latitude': 'REAL',
+    'longitude': 'REAL',
+}
+
+INDEXED_COLUMNS = ['status', 'modified', 'city', 'typeName', 'postalCode']
+
+NUMERIC_COLUMNS = ['price', 'originalListPrice', 'priceLow', 'squareFeet']
+
+
+def connect(db_path=LISTING_DB_FILE):
+    """Open the listing store, creating the table and indexes if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    columns = ", ".join(f'"{name}" {sql_type}' for name, sql_type in STORE_COLUMNS.items())
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS listings ("
+        f"listingID TEXT PRIMARY KEY, {columns}, data TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    for column in INDEXED_COLUMNS:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_listings_{column} ON listings ("{column}")')
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sync_state ("
+        "query_key TEXT PRIMARY KEY, watermark TEXT NOT NULL, synced_at TEXT NOT NULL)"
+    )
+    # Which listings a scrape produced, for browsing one scrape that was too big to hold in memory
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS run_listings ("
+        "run_id TEXT NOT NULL, listingID TEXT NOT NULL, PRIMARY KEY (run_id, listingID))"
+    )
+    return conn
+
+
+def _to_number(value):
+    """Coerce API values such as "1,299,000" to float, or None."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _row_for(listing, updated_at):
+    """Flatten one listing into the store's column order."""
+    row = [str(listing['listingID'])]
+    for name, sql_type in STORE_COLUMNS.items():
+        value = listing.get(name)
+        if sql_type in ('REAL', 'INTEGER'):
+            value = _to_number(value)
+        elif value is not None:
+            value = str(value)
+        row.append(value)
+    row.extend([json.dumps(listing), updated_at])
+    return row
+
+
+def upsert_listings(listings, run_id=None, db_path=LISTING_DB_FILE):
+    """
+    Insert or replace listings by listingID.
+
+    :param listings: Iterable of listing dictionaries from the API.
+    :param run_id: Also record the listings as members of this scrape (see clear_run).
+    :param db_path: Path to the SQLite store.
+    :return: Number of listings written.
+    """
+    updated_at = datetime.now().isoformat()
+    rows = [_row_for(listing, updated_at) for listing in listings if listing.get('listingID') is not None]
+    if not rows:
+        return 0
+    names = ['listingID', *STORE_COLUMNS, 'data', 'updated_at']
+    placeholders = ", ".join("?" for _ in names)
+    column_list = ", ".join(f'"{name}"' for name in names)
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(f"INSERT OR REPLACE INTO listings ({column_list}) VALUES ({placeholders})", rows)
+            if run_id is not None:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO run_listings (run_id, listingID) VALUES (?, ?)",
+                    [(run_id, row[0]) for row in rows]
+                )
+    finally:
+        conn.close()
+    logging.info(f"Upserted {len(rows)} listings into {db_path}")
+    return len(rows)
+
+
+def clear_run(run_id, db_path=LISTING_DB_FILE):
+    """Forget which listings a scrape produced, before it is recorded again."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM run_listings WHERE run_id = ?", (run_id,))
+    finally:
+        conn.close()
+
+
+def _where_clause(cities=None, property_types=None, statuses=None, price_range=None,
+                  modified_range=None, run_id=None):
+    """Translate dashboard filters into an SQL WHERE clause and parameters."""
+    clauses = []
+    params = []
+    if run_id is not None:
+        clauses.append("listingID IN (SELECT listingID FROM run_listings WHERE run_id = ?)")
+        params.append(run_id)
+    for column, values in (('city', cities), ('typeName', property_types), ('status', statuses)):
+        if values:
+            clauses.append(f'"{column}" IN ({", ".join("?" for _ in values)})')
+            params.extend(values)
+    if price_range is not None:
+        clauses.append("price BETWEEN ? AND ?")
+        params.extend(price_range)
+    if modified_range is not None:
+        clauses.append("modified >= ? AND modified < ?")
+        params.extend(str(bound) for bound in modified_range)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def count_listings(db_path=LISTING_DB_FILE, **filters):
+    """Count listings matching the given filters (see query_listings)."""
+    where, params = _where_clause(**filters)
+    conn = connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM listings {where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def query_listings(db_path=LISTING_DB_FILE, limit=100, offset=0, order_by='modified DESC', **filters):
+    """
+    Load one page of listings matching the filters.
+
+    :param db_path: Path to the SQLite store.
+    :param limit: Maximum rows to return, or None for all.
+    :param offset: Rows to skip (for paging).
+    :param order_by: SQL ORDER BY expression.
+    :param filters: cities, property_types, statuses, price_range, modified_range, run_id.
+    :return: DataFrame of listing records.
+    """
+    where, params = _where_clause(**filters)
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT data FROM listings {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, offset]
+        ).fetchall()
+    finally:
+        conn.close()
+    df = pd.DataFrame([json.loads(row[0]) for row in rows])
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+
+def iter_listings(db_path=LISTING_DB_FILE, batch_size=1000, run_id=None):
+    """
+    Yield stored listings as their original dictionaries, reading batch_size rows at a time.
+
+    :param run_id: Only the listings recorded for this scrape.
+    """
+    where, params = _where_clause(run_id=run_id)
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(f"SELECT data FROM listings {where}", params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield json.loads(row[0])
+    finally:
+        conn.close()
+
+
+def distinct_values(column, db_path=LISTING_DB_FILE):
+    """Sorted distinct non-null values of an indexed column."""
+    if column not in INDEXED_COLUMNS:
+        raise ValueError(f"Column {column} is not indexed")
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            f'SELECT DISTINCT "{column}" FROM listings WHERE "{column}" IS NOT NULL ORDER BY "{column}"'
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+def price_bounds(db_path=LISTING_DB_FILE):
+    """Return (min, max) listing price in the store, or (0.0, 0.0) if empty."""
+    conn = connect(db_path)
+    try:
+        low, high = conn.execute("SELECT MIN(price), MAX(price) FROM listings").fetchone()
+    finally:
+        conn.close()
+    return float(low or 0), float(high or 0)
+
+
+def get_watermark(query_key, db_path=LISTING_DB_FILE):
+    """Return the latest 'modified' value synced for a query, or None."""
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT watermark FROM sync_state WHERE query_key = ?", (query_key,)).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def set_watermark(query_key, watermark, db_path=LISTING_DB_FILE):
+    """Record the latest 'modified' value synced for a query."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (query_key, watermark, synced_at) VALUES (?, ?, ?)",
+                (query_key, watermark, datetime.now().isoformat())
+            )
+    finally:
+        conn.close()
@@ -0,0 +1,298 @@
+import os
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+except ImportError:
+    h2 = None
+
+TRANSPORTS = ('http1', 'http2')
+
+# http1: a requests session per worker, one request per connection at a time.
+# http2: one shared client multiplexing every worker's requests over a few connections.
+DEFAULT_TRANSPORT = os.environ.get("WEBSCRAPER_TRANSPORT", "http1")
+
+HTTP2_MAX_CONNECTIONS = 2
+
+# Same retry policy as the requests sessions: 5 retries, exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 1
+# Statuses whose Retry-After header replaces the backoff, as urllib3 does
+RETRY_AFTER_STATUSES = (413, 429, 503)
+
+# Encodings urllib3 can decode here: gzip and deflate, plus br/zstd when brotli/zstandard are installed
+HTTP1_ACCEPT_ENCODING = ACCEPT_ENCODING
+
+# Per-connection stream counts and bytes, accumulated across all threads
+_connection_stats = {}
+_connection_labels = {}
+_stats_lock = threading.Lock()
+
+_http2_client = None
+_client_lock = threading.Lock()
+
+
+def http2_available():
+    """Whether httpx and h2 are installed."""
+    return httpx is not None and h2 is not None
+
+
+def _stream_opened(key, http_version):
+    with _stats_lock:
+        if key not in _connection_labels:
+            _connection_labels[key] = f"{http_version} #{len(_connection_labels) + 1}"
+        stats = _connection_stats.setdefault(_connection_labels[key], {
+            'http_version': http_version, 'streams': 0, 'active': 0, 'max_concurrent': 0,
+            'wire_bytes': 0, 'body_bytes': 0, 'encodings': set(),
+        })
+        stats['streams'] += 1
+        stats['active'] += 1
+        stats['max_concurrent'] = max(stats['max_concurrent'], stats['active'])
+
+
+def wire_bytes(response):
+    """
+    Bytes of a response body as sent, before content decoding; 0 if unknown.
+
+    urllib3 doesn't count chunked bodies, so those are only known via Content-Length.
+    """
+    if isinstance(response, Http2Response):
+        return response.wire_bytes
+    return int(response.headers.get('Content-Length') or response.raw.tell() or 0)
+
+
+def record_transfer(response, body_bytes):
+    """
+    Close out a response in the connection statistics. Safe to call more than once.
+
+    :param response: requests.Response or Http2Response.
+    :param body_bytes: Size of the decoded body that was read.
+    """
+    key = getattr(response, 'connection_key', None)
+    if key is None or getattr(response, 'transfer_recorded', False):
+        return
+    response.transfer_recorded = True
+    sent = wire_bytes(response)
+    with _stats_lock:
+        stats = _connection_stats[_connection_labels[key]]
+        stats['active'] -= 1
+        # Only bodies of known size count towards the compression ratio
+        if sent and body_bytes:
+            stats['wire_bytes'] += sent
+            stats['body_bytes'] += body_bytes
+        stats['encodings'].add(response.headers.get('Content-Encoding') or 'identity')
+
+
+def release_response(response):
+    """Close a response, e.g. an error that was never decoded, and close it out in the statistics."""
+    record_transfer(response, None)
+    response.close()
+
+
+def track_http1_response(response, *args, **kwargs):
+    """requests response hook: note which pooled connection carried the response."""
+    # Only still attached while the body is unread, i.e. for stream=True requests
+    connection = getattr(response.raw, 'connection', None)
+    response.connection_key = ('http1', id(connection if connection is not None else response))
+    _stream_opened(response.connection_key, 'HTTP/1.1')
+
+
+def get_connection_stats():
+    """Snapshot of streams, peak concurrent streams, bytes and compression ratio per connection."""
+    with _stats_lock:
+        snapshot = []
+        for label, stats in _connection_stats.items():
+            entry = {key: value for key, value in stats.items() if key not in ('active', 'encodings')}
+            entry['connection'] = label
+            entry['encodings'] = ", ".join(sorted(stats['encodings']))
+            entry['compression_ratio'] = (
+                round(stats['body_bytes'] / stats['wire_bytes'], 2) if stats['wire_bytes'] else None
+            )
+            snapshot.append(entry)
+    return snapshot
+
+
+def reset_connection_stats():
+    with _stats_lock:
+        _connection_stats.clear()
+        _connection_labels.clear()
+
+
+def log_connection_stats():
+    """Log a one-line summary per connection."""
+    for stats in get_connection_stats():
+        ratio = f"{stats['compression_ratio']}x" if stats['compression_ratio'] else "unknown"
+        logging.info(
+            f"Connection {stats['connection']}: {stats['streams']} streams (peak {stats['max_concurrent']} concurrent), "
+            f"{stats['wire_bytes'] / 1024:.1f} KiB on the wire, compression {ratio} ({stats['encodings']})"
+        )
+
+
+class Http2Response:
+    """
+    The slice of requests.Response the scraper uses, over a streamed httpx response.
+
+    httpx errors are re-raised as their requests counterparts so callers'
+    error handling doesn't depend on the transport.
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.body_bytes = 0
+        network_stream = response.extensions.get('network_stream')
+        self.connection_key = ('http2', id(network_stream if network_stream is not None else response))
+        _stream_opened(self.connection_key, response.http_version)
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def wire_bytes(self):
+        return self._response.num_bytes_downloaded
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error: {self._response.reason_phrase} for url: {self.url}", response=self
+            )
+
+    def iter_content(self, chunk_size=None):
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                self.body_bytes += len(chunk)
+                yield chunk
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+
+    def close(self):
+        self._response.close()
+        record_transfer(self, self.body_bytes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def retry_after_seconds(response):
+    """Seconds asked for by a Retry-After header (delay or HTTP date), or None if absent or invalid."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Http2Session:
+    """
+    requests.Session stand-in sending through the process-wide HTTP/2 client.
+
+    Cheap to create: every instance shares the client's connections, so
+    concurrent workers' requests become streams on the same connections.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        attempt = 0
+        while True:
+            delay = BACKOFF_FACTOR * 2 ** attempt
+            try:
+                request = self.client.build_request('GET', url, params=params, timeout=timeout)
+                response = self.client.send(request, stream=True)
+            except httpx.ConnectTimeout as e:
+                # Nothing was sent yet, so like urllib3 a connect timeout is retried
+                if attempt >= MAX_RETRIES:
+                    raise requests.exceptions.ConnectTimeout(str(e))
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e))
+            except httpx.TransportError as e:
+                if attempt >= MAX_RETRIES:
+                    raise requests.exceptions.ConnectionError(str(e))
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= MAX_RETRIES:
+                    wrapped = Http2Response(response)
+                    if not stream:
+                        self._read_body(wrapped)
+                    return wrapped
+                if response.status_code in RETRY_AFTER_STATUSES:
+                    retry_after = retry_after_seconds(response)
+                    if retry_after is not None:
+                        delay = retry_after
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    def _read_body(wrapped):
+        """Read a whole body up front, as requests does without stream=True, and close out the stream."""
+        try:
+            wrapped.body_bytes = len(wrapped._response.read())
+        except httpx.HTTPError as e:
+            wrapped.close()
+            raise requests.exceptions.ConnectionError(str(e))
+        wrapped.close()
+
+
+def create_http2_session(headers, cookies, prior_knowledge=False):
+    """
+    Session over the shared HTTP/2 client, created on first use.
+
+    :param headers: Default request headers; connection-specific ones are dropped.
+    :param cookies: Cookies sent with every request.
+    :param prior_knowledge: Speak HTTP/2 to a plain-http server without negotiating, e.g. a local test server.
+    :return: Http2Session.
+    """
+    global _http2_client
+    with _client_lock:
+        if _http2_client is None:
+            # httpx sets Accept-Encoding from the decoders it has (gzip, deflate, br, zstd)
+            headers = {
+                key: value for key, value in headers.items()
+                if key.lower() not in ('connection', 'keep-alive', 'accept-encoding')
+            }
+            limits = httpx.Limits(max_connections=HTTP2_MAX_CONNECTIONS,
+                                  max_keepalive_connections=HTTP2_MAX_CONNECTIONS)
+            # httpx logs every request at INFO; the scraper already logs per window
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            _http2_client = httpx.Client(http1=not prior_knowledge, http2=True, headers=headers,
+                                         cookies=cookies, limits=limits)
+            logging.info(f"HTTP/2 client started with up to {HTTP2_MAX_CONNECTIONS} connections")
+    return Http2Session(_http2_client)
+
+
+def close_http2_client():
+    """Close the shared HTTP/2 client; the next session opens a new one."""
+    global _http2_client
+    with _client_lock:
+        if _http2_client is not None:
+            _http2_client.close()
+            _http2_client = None
@@ -0,0 +1,253 @@
+import gzip
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+import scraper
+import transport
+
+DEFAULT_FIXTURE = "latest_scrape.json"
+
+# Simulated server think time per response; multiplexing only pays off when there's latency to overlap
+DEFAULT_LATENCY = 0.05
+
+
+def _compressors():
+    """Content encodings the stand-in can produce, preferred first."""
+    compressors = {}
+    if zstandard is not None:
+        compressors['zstd'] = zstandard.ZstdCompressor().compress
+    if brotli is not None:
+        compressors['br'] = brotli.compress
+    compressors['gzip'] = lambda body: gzip.compress(body, compresslevel=6)
+    return compressors
+
+
+def search_page(listings, path, accept_encoding):
+    """
+    Body and headers a search request would get: the $skip/$take page of the fixture, compressed.
+
+    :return: (body bytes, list of (header, value) pairs).
+    """
+    query = parse_qs(urlsplit(path).query)
+    skip = int(query.get('$skip', ['0'])[0])
+    take = int(query.get('$take', [str(scraper.PAGE_SIZE)])[0])
+    body = json.dumps({
+        'searchResults': {'total': len(listings), 'data': listings[skip:skip + take]}
+    }).encode()
+    headers = [('content-type', 'application/json')]
+    accepted = {encoding.split(';')[0].strip() for encoding in (accept_encoding or '').split(',')}
+    for encoding, compress in _compressors().items():
+        if encoding in accepted:
+            body = compress(body)
+            headers.append(('content-encoding', encoding))
+            break
+    headers.append(('content-length', str(len(body))))
+    return body, headers
+
+
+def serve_http1(listings, latency=DEFAULT_LATENCY, host="127.0.0.1", port=0):
+    """
+    Start a local HTTP/1.1 keep-alive stand-in for the search endpoint on a daemon thread.
+
+    :return: (server, base URL); call server.shutdown() to stop it.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body, headers = search_page(listings, self.path, self.headers.get('Accept-Encoding'))
+            self.send_response(200)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="http1-stand-in", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/search"
+
+
+class _H2Handler(socketserver.BaseRequestHandler):
+    """
+    One cleartext HTTP/2 connection (prior knowledge). The socket is read on
+    this thread; each stream is answered on its own thread so responses
+    interleave, with DATA frames held back while the flow-control window is shut.
+    """
+
+    def setup(self):
+        config = h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+        self.conn = h2.connection.H2Connection(config=config)
+        self.lock = threading.Condition()
+        self.closed = False
+
+    def _flush(self):
+        self.request.sendall(self.conn.data_to_send())
+
+    def _respond(self, stream_id, headers):
+        time.sleep(self.server.latency)
+        request_headers = dict(headers)
+        body, response_headers = search_page(
+            self.server.listings, request_headers.get(':path', '/'), request_headers.get('accept-encoding')
+        )
+        with self.lock:
+            try:
+                self.conn.send_headers(stream_id, [(':status', '200'), *response_headers])
+                self._flush()
+                sent = 0
+                while sent < len(body):
+                    window = min(self.conn.local_flow_control_window(stream_id), self.conn.max_outbound_frame_size)
+                    if window <= 0:
+                        if self.closed:
+                            return
+                        self.lock.wait()
+                        continue
+                    chunk = body[sent:sent + window]
+                    self.conn.send_data(stream_id, chunk)
+                    self._flush()
+                    sent += len(chunk)
+                self.conn.end_stream(stream_id)
+                self._flush()
+            except (h2.exceptions.ProtocolError, OSError):
+                # The client reset the stream or went away
+                pass
+
+    def handle(self):
+        with self.lock:
+            self.conn.initiate_connection()
+            self._flush()
+        try:
+            while True:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                with self.lock:
+                    events = self.conn.receive_data(data)
+                    self._flush()
+                    for event in events:
+                        if isinstance(event, h2.events.RequestReceived):
+                            threading.Thread(target=self._respond, args=(event.stream_id, event.headers),
+                                             daemon=True).start()
+                        elif isinstance(event, h2.events.ConnectionTerminated):
+                            return
+                    # Window updates may let a waiting stream send again
+                    self.lock.notify_all()
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            with self.lock:
+                self.closed = True
+                self.lock.notify_all()
+
+
+def serve_http2(listings, latency=DEFAULT_LATENCY, host="127.0.0.1", port=0):
+    """
+    Start a local cleartext HTTP/2 stand-in for the search endpoint on a daemon thread.
+
+    :return: (server, base URL); call server.shutdown() to stop it.
+    """
+    if h2 is None:
+        raise RuntimeError("The HTTP/2 stand-in needs the h2 package")
+
+    class Server(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    server = Server((host, port), _H2Handler)
+    server.listings = listings
+    server.latency = latency
+    server.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    threading.Thread(target=server.serve_forever, name="http2-stand-in", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/search"
+
+
+def run_benchmark(listings, transport_name, windows=12, workers=3, latency=DEFAULT_LATENCY):
+    """
+    Fetch every window from a local stand-in through one transport, the way a scrape does.
+
+    :param listings: Fixture listings served for every window.
+    :param transport_name: 'http1' or 'http2'.
+    :param windows: Number of date windows to fetch.
+    :param workers: Concurrent window fetchers.
+    :param latency: Simulated server latency per response.
+    :return: Dictionary with seconds, listings, requests/sec and the per-connection statistics.
+    """
+    serve = serve_http2 if transport_name == 'http2' else serve_http1
+    server, url = serve(listings, latency)
+    saved = scraper.SEARCH_URL, scraper.DEFAULT_TRANSPORT
+    scraper.SEARCH_URL, scraper.DEFAULT_TRANSPORT = url, transport_name
+    transport.reset_connection_stats()
+    transport.close_http2_client()
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda _: scraper.fetch_all_pages_for_date_range("01/01/2025", "01/02/2025"), range(windows)
+            ))
+        seconds = time.perf_counter() - started
+    finally:
+        scraper.SEARCH_URL, scraper.DEFAULT_TRANSPORT = saved
+        transport.close_http2_client()
+        server.shutdown()
+        server.server_close()
+    connections = transport.get_connection_stats()
+    requests_sent = sum(stats['streams'] for stats in connections)
+    return {
+        'transport': transport_name,
+        'seconds': round(seconds, 3),
+        'listings': sum(len(result) for result in results),
+        'requests': requests_sent,
+        'requests_per_second': round(requests_sent / seconds, 1) if seconds else None,
+        'connections': connections,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HTTP/1.1 and HTTP/2 transports against local stand-in servers.")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="JSON file of listings to serve")
+    parser.add_argument("--windows", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Seconds of server latency per response")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with open(args.fixture, 'r') as f:
+        fixture = json.load(f)
+    names = ['http1', 'http2'] if transport.http2_available() else ['http1']
+    for name in names:
+        result = run_benchmark(fixture, name, args.windows, args.workers, args.latency)
+        print(f"{name}: {result['seconds']}s, {result['listings']} listings, "
+              f"{result['requests']} requests, {result['requests_per_second']} req/s")
+        for stats in result['connections']:
+            print(f"  {stats['connection']}: {stats['streams']} streams, peak {stats['max_concurrent']} concurrent, "
+                  f"compression {stats['compression_ratio']}x ({stats['encodings']})")
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# Fields returned by fetch_listing_status, in display order
+VERIFICATION_COLUMNS = [
+    'found', 'status', 'displayStatus', 'modified', 'price', 'daysOnMarket',
+    'verified', 'still_terminated', 'verified_at', 'error'
+]
+
+
+def verification_results_to_frame(verification_results):
+    """
+    Convert the {listingID: status_info} mapping from verify_listing_status
+    into a columnar table keyed by listingID.
+
+    :param verification_results: Dictionary mapping listing IDs to status dictionaries.
+    :return: DataFrame with a 'listingID' column plus VERIFICATION_COLUMNS.
+    """
+    frame = pd.DataFrame.from_dict(verification_results, orient='index')
+    frame = frame.reindex(columns=VERIFICATION_COLUMNS)
+    frame.index.name = 'listingID'
+    return frame.reset_index()
+
+
+def join_verification_results(scraped_df, verification_frame):
+    """
+    Merge verification results onto the scraped listings in one keyed join.
+
+    Verified values replace the scraped ones; where verification returned
+    nothing for a field (e.g. on error) the scraped value is kept.
+
+    :param scraped_df: DataFrame of scraped listings with a 'listingID' column.
+    :param verification_frame: Output of verification_results_to_frame.
+    :return: DataFrame with one row per verified listing.
+    """
+    listings = scraped_df.drop_duplicates(subset='listingID')
+    merged = listings.merge(verification_frame, on='listingID', how='inner', suffixes=('', '_verified'))
+
+    for col in verification_frame.columns:
+        verified_col = f"{col}_verified"
+        if verified_col in merged.columns:
+            merged[col] = merged[verified_col].combine_first(merged[col])
+            merged = merged.drop(columns=verified_col)
+    return merged
+
+
+def status_change_labels(verified_df):
+    """
+    Build the "Status Change" indicator for every verified listing at once.
+
+    :param verified_df: Output of join_verification_results.
+    :return: Series of display labels aligned with verified_df.
+    """
+    verified = verified_df['verified'].fillna(False).astype(bool)
+    still_terminated = verified_df['still_terminated'].fillna(False).astype(bool)
+    found = verified_df['found'].fillna(True).astype(bool)
+
+    labels = np.select(
+        [~verified, still_terminated, ~found],
+        ["❔ Verification Failed", "✅ Still Terminated", "❌ Not Found"],
+        default="⚠️ No Longer Terminated"
+    )
+    return pd.Series(labels, index=verified_df.index)
+
+
+def prioritize_listing_ids(listings_df, matched_ids=()):
+    """
+    Order listing IDs by how likely their status is to have changed.
+
+    Client-matched listings come first, then the most recently modified,
+    then the fewest days on market.
+
+    :param listings_df: DataFrame of scraped listings.
+    :param matched_ids: Listing IDs that matched a client address.
+    :return: List of unique listing IDs, highest priority first.
+    """
+    listings = listings_df.drop_duplicates(subset='listingID')
+    priority = pd.DataFrame({
+        'listingID': listings['listingID'],
+        'matched': listings['listingID'].isin(set(matched_ids)),
+        'modified': pd.to_datetime(listings.get('modified'), errors='coerce', utc=True),
+        'daysOnMarket': pd.to_numeric(listings.get('daysOnMarket'), errors='coerce'),
+    })
+    priority = priority.sort_values(
+        ['matched', 'modified', 'daysOnMarket'],
+        ascending=[False, False, True],
+        na_position='last',
+        kind='stable'
+    )
+    return priority['listingID'].tolist()
@@ -0,0 +1,263 @@
+import os
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from clients import load_client_book
+from matching import DEFAULT_MATCH_THRESHOLD, find_fuzzy_matching_listings
+from scraper import sync_listings
+
+WATCHLIST_DB_FILE = os.path.join("cache", "watchlist.db")
+# Prefix of each client book's sync watermark
+WATERMARK_KEY = "watchlist"
+
+DEFAULT_POLL_INTERVAL = timedelta(minutes=10)
+# How far back the very first poll looks; later polls start at the watermark
+DEFAULT_INITIAL_LOOKBACK = timedelta(days=1)
+
+_MATCH_COLUMNS = ['listingID', 'streetAddress', 'city', 'status', 'price', 'modified']
+
+# One monitor per client book in this process, keyed by book_id
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def book_id(client_book):
+    """Identity of a client book's contents, shared by every session that uploads the same file."""
+    return client_book.key[0][:16]
+
+
+def connect(db_path=WATCHLIST_DB_FILE):
+    """Open the watchlist database, creating its table if needed."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(matches)")]
+    if columns and 'client_book' not in columns:
+        # Matches recorded before they were keyed by client book; kept aside rather than guessed at
+        try:
+            conn.execute("ALTER TABLE matches RENAME TO matches_legacy")
+            logging.info("Moved watchlist matches without a client book to matches_legacy")
+        except sqlite3.OperationalError:
+            pass  # Another connection moved them first
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS matches ("
+        "client_book TEXT NOT NULL, "
+        "listingID TEXT NOT NULL, "
+        "client_row INTEGER NOT NULL, "
+        "client_address TEXT, "
+        "matched_address_column TEXT NOT NULL, "
+        "match_score REAL, "
+        "streetAddress TEXT, "
+        "city TEXT, "
+        "status TEXT, "
+        "price REAL, "
+        "modified TEXT, "
+        "detected_at TEXT NOT NULL, "
+        "PRIMARY KEY (client_book, listingID, client_row, matched_address_column))"
+    )
+    return conn
+
+
+def probe_listings(listings, client_book, threshold=DEFAULT_MATCH_THRESHOLD):
+    """
+    Match newly fetched listings against a resident client book.
+
+    Only the new listings are parsed; the client side uses the book's
+    prebuilt address index, so each poll costs time proportional to the
+    number of new listings.
+
+    :param listings: Listing dictionaries from the API.
+    :param client_book: ClientBook from clients.load_client_book.
+    :param threshold: Minimum street-name similarity for a match.
+    :return: DataFrame of matches (see find_fuzzy_matching_listings), with the client row number.
+    """
+    if not listings:
+        return pd.DataFrame()
+    frame = pd.DataFrame(listings)
+    if 'streetAddress' not in frame.columns:
+        return pd.DataFrame()
+    client_frame = client_book.frame.assign(client_row=range(len(client_book.frame)))
+    return find_fuzzy_matching_listings(
+        frame,
+        client_frame,
+        client_book.address_columns,
+        threshold=threshold,
+        client_index=client_book.address_index
+    )
+
+
+def record_matches(matches, client_book, db_path=WATCHLIST_DB_FILE):
+    """
+    Store matches not seen before for this client book.
+
+    :param matches: DataFrame from probe_listings.
+    :param client_book: ClientBook the matches were probed against.
+    :return: List of match dictionaries that were new.
+    """
+    if matches is None or len(matches) == 0:
+        return []
+    detected_at = datetime.now().isoformat()
+    new_matches = []
+    conn = connect(db_path)
+    try:
+        with conn:
+            for row in matches.to_dict('records'):
+                event = {column: row.get(column) for column in _MATCH_COLUMNS}
+                event.update({
+                    'client_book': book_id(client_book),
+                    'listingID': str(row.get('listingID')),
+                    'client_row': int(row['client_row']),
+                    'client_address': row.get(row['matched_address_column'],
+                                              row.get(f"{row['matched_address_column']}_client")),
+                    'matched_address_column': row['matched_address_column'],
+                    'match_score': float(row['match_score']),
+                    'detected_at': detected_at,
+                })
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO matches (client_book, listingID, client_row, client_address, "
+                    "matched_address_column, match_score, streetAddress, city, status, price, modified, detected_at) "
+                    "VALUES (:client_book, :listingID, :client_row, :client_address, :matched_address_column, "
+                    ":match_score, :streetAddress, :city, :status, :price, :modified, :detected_at)",
+                    {key: (None if pd.isna(value) else value) for key, value in event.items()}
+                )
+                if cursor.rowcount == 1:
+                    new_matches.append(event)
+    finally:
+        conn.close()
+    return new_matches
+
+
+def list_matches(limit=100, client_book=None, db_path=WATCHLIST_DB_FILE):
+    """Most recently detected matches, newest first, optionally only those of one client book."""
+    where, params = ("WHERE client_book = ?", [book_id(client_book)]) if client_book is not None else ("", [])
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(
+            f"SELECT * FROM matches {where} ORDER BY detected_at DESC, match_score DESC LIMIT ?",
+            conn, params=[*params, limit]
+        )
+    finally:
+        conn.close()
+
+
+def run_watch_cycle(client_book, threshold=DEFAULT_MATCH_THRESHOLD, on_match=None,
+                    initial_lookback=DEFAULT_INITIAL_LOOKBACK, db_path=WATCHLIST_DB_FILE):
+    """
+    Fetch listings updated since the last poll and record any new client matches.
+
+    :param client_book: ClientBook to match against.
+    :param threshold: Minimum street-name similarity for a match.
+    :param on_match: Optional callback called with each new match dictionary.
+    :param initial_lookback: How far back the first poll looks.
+    :param db_path: Path to the watchlist database.
+    :return: List of new match dictionaries.
+    """
+    # Each book keeps its own watermark, so one book's poll doesn't skip listings another hasn't seen
+    listings = sync_listings(
+        initial_start=datetime.now() - initial_lookback,
+        watermark_key=f"{WATERMARK_KEY}_{book_id(client_book)}",
+        profile='match'
+    )
+    new_matches = record_matches(probe_listings(listings, client_book, threshold), client_book, db_path)
+    for event in new_matches:
+        logging.warning(
+            f"Watchlist match: listing {event['listingID']} at {event['streetAddress']} "
+            f"matches client row {event['client_row']} ({event['match_score']:.2f})"
+        )
+        if on_match is not None:
+            try:
+                on_match(event)
+            except Exception as e:
+                logging.error(f"Error in watchlist match callback: {e}")
+    logging.info(f"Watchlist poll: {len(listings)} updated listings, {len(new_matches)} new matches")
+    return new_matches
+
+
+def run_watch_scheduler(client_book, interval=DEFAULT_POLL_INTERVAL, threshold=DEFAULT_MATCH_THRESHOLD,
+                        on_match=None, stop_event=None, db_path=WATCHLIST_DB_FILE):
+    """
+    Poll for new matches every interval until stop_event is set.
+
+    :param client_book: ClientBook kept in memory for the life of the monitor.
+    :param interval: Time between polls.
+    :param threshold: Minimum street-name similarity for a match.
+    :param on_match: Optional callback called with each new match dictionary.
+    :param stop_event: Optional threading.Event that ends the loop.
+    :param db_path: Path to the watchlist database.
+    """
+    stop_event = stop_event or threading.Event()
+    logging.info(f"Watchlist monitor started: {len(client_book.frame)} clients, every {interval}")
+    while not stop_event.is_set():
+        started = time.monotonic()
+        try:
+            run_watch_cycle(client_book, threshold, on_match, db_path=db_path)
+        except Exception as e:
+            logging.error(f"Error polling watchlist: {e}")
+        stop_event.wait(max(0.0, interval.total_seconds() - (time.monotonic() - started)))
+
+
+def start_background_watcher(client_book, interval=DEFAULT_POLL_INTERVAL, threshold=DEFAULT_MATCH_THRESHOLD,
+                             on_match=None):
+    """
+    Run the watchlist monitor for a client book on a daemon thread.
+
+    Each book gets at most one monitor per process: sessions that upload the
+    same book share it, and the monitor outlives the session that started it
+    until stop_background_watcher is called.
+
+    :return: The Event that stops the monitor.
+    """
+    key = book_id(client_book)
+    with _watchers_lock:
+        watcher = _watchers.get(key)
+        if watcher is not None and watcher['thread'].is_alive() and not watcher['stop'].is_set():
+            return watcher['stop']
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=run_watch_scheduler,
+            kwargs={'client_book': client_book, 'interval': interval, 'threshold': threshold,
+                    'on_match': on_match, 'stop_event': stop_event},
+            name=f"watchlist-monitor-{key}",
+            daemon=True
+        )
+        _watchers[key] = {'stop': stop_event, 'thread': thread}
+        thread.start()
+    return stop_event
+
+
+def is_watching(client_book):
+    """Whether a monitor is running for this client book in this process."""
+    with _watchers_lock:
+        watcher = _watchers.get(book_id(client_book))
+        return watcher is not None and watcher['thread'].is_alive() and not watcher['stop'].is_set()
+
+
+def stop_background_watcher(client_book):
+    """Stop the client book's monitor, for every session sharing it."""
+    with _watchers_lock:
+        watcher = _watchers.pop(book_id(client_book), None)
+    if watcher is not None:
+        watcher['stop'].set()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch for client addresses appearing as terminated listings.")
+    parser.add_argument("clients", help="Client CSV file")
+    parser.add_argument("--column", default="Address 1 - Street", help="Primary street address column")
+    parser.add_argument("--interval-minutes", type=float, default=DEFAULT_POLL_INTERVAL.total_seconds() / 60)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_MATCH_THRESHOLD)
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args()
+
+    with open(args.clients, 'rb') as f:
+        book = load_client_book(f.read(), args.column)
+    if args.once:
+        for match in run_watch_cycle(book, args.threshold):
+            print(f"{match['listingID']}\t{match['streetAddress']}\t{match['client_address']}\t{match['match_score']:.2f}")
+    else:
+        run_watch_scheduler(book, timedelta(minutes=args.interval_minutes), args.threshold)